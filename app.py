@@ -1,11 +1,19 @@
+import os
 import streamlit as st
 import pandas as pd
-from strategy_analysis import analyze_strategy
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+from strategy_analysis import analyze_strategy, strategy_indicators, indicator_cache
+from result_cache import result_cache
+from data_store import load_ohlcv, data_version, last_update
+from signal_scan import scan_signal_counts, ScanCache
+from signal_index import SignalIndex, INDEX_PATH
+from chart_lod import visible_slice, MAX_CHART_POINTS
+from chart_builder import build_analysis_figure, format_signal_dates
+from backtest import forward_returns, summarize
+from profiling import Profiler, stage, timed
+from pattern_search import PatternIndex, INDEX_PATH as PATTERN_INDEX_PATH
+from background_jobs import JobRunner
+from contextlib import closing
 from datetime import datetime, timedelta
-import yfinance as yf
-import time
 
 st.set_page_config(layout="wide")
 
@@ -26,130 +34,221 @@ if 'current_interval' not in st.session_state:
     st.session_state.current_interval = None
 if 'last_interval' not in st.session_state:
     st.session_state.last_interval = None
+if 'scan_job' not in st.session_state:
+    st.session_state.scan_job = None
+if 'analysis_job' not in st.session_state:
+    st.session_state.analysis_job = None
+if 'last_analysis' not in st.session_state:
+    st.session_state.last_analysis = None
 
-def plot_analysis_streamlit(ohlcv, signals, ema_period, ma_long_period, ma_mid_periods):
-    # 인터랙티브 차트 생성
-    fig = make_subplots(rows=2, cols=1, 
-                        shared_xaxes=True,
-                        vertical_spacing=0.03,
-                        row_heights=[0.7, 0.3])
-
-    # 캔들스틱 차트 추가
-    fig.add_trace(
-        go.Candlestick(
-            x=ohlcv.index,
-            open=ohlcv['open'],
-            high=ohlcv['high'],
-            low=ohlcv['low'],
-            close=ohlcv['close'],
-            name=st.session_state.current_ticker
-        ),
-        row=1, col=1
-    )
+# 세션 간 공유 캐시: 같은 서버의 모든 세션이 함께 사용한다.
+# 키에 데이터 파일 버전이 들어가므로 파일이 바뀌면 새로 계산하고,
+# 수집기가 저장소를 갱신하면(last_update 표시 파일) 전체를 비운다.
+# 종료일은 항상 현재 시각이고 저장소에는 그 이후 봉이 없으므로 키에서 제외한다.
+CACHE_TTL = 24 * 60 * 60
 
-    # 이동평균선 추가
-    colors = {
-        f'EMA{ema_period}': 'blue',
-        f'MA{ma_long_period}': 'red',
-        f'MA{ma_mid_periods[0]}': 'green',
-        f'MA{ma_mid_periods[1]}': 'orange',
-        f'MA{ma_mid_periods[2]}': 'purple'
-    }
-    
-    for ma_name, color in colors.items():
-        line_width = 3 if ma_name == f'EMA{ema_period}' or ma_name == f'MA{ma_long_period}' else 1
-
-        fig.add_trace(
-            go.Scatter(
-                x=ohlcv.index,
-                y=ohlcv[ma_name],
-                name=ma_name,
-                line=dict(color=color, width=line_width),
-                opacity=0.7
-            ),
-            row=1, col=1
-        )
-
-    # 시그널 포인트 추가
-    signal_points = ohlcv[signals]['close']
-    fig.add_trace(
-        go.Scatter(
-            x=signal_points.index,
-            y=signal_points+10,
-            mode='markers',
-            name='Signal',
-            marker=dict(
-                symbol='triangle-down',
-                size=10,
-                color='red'
-            )
-        ),
-        row=1, col=1
-    )
+# 분석 결과를 이 시간(초) 안에 못 받으면 이전 결과를 먼저 그리고, 작업 상태는 이 간격으로 확인
+ANALYSIS_WAIT_SECONDS = 0.1
+# 그릴 이전 결과가 없을 때 분석 결과를 기다리는 최대 시간 (넘으면 진행 중으로 표시하고 끝나면 다시 그림)
+ANALYSIS_TIMEOUT_SECONDS = 3.0
+JOB_POLL_SECONDS = 0.5
+# 전체 종목 데이터 버전을 다시 확인하는 최대 간격(초). 수집기 갱신 표시가 바뀌면 바로 다시 확인한다
+VERSION_TTL = 60
 
-    # 거래량 차트 추가
-    colors = ['red' if row['close'] < row['open'] else 'green' 
-             for i, row in ohlcv.iterrows()]
-    
-    fig.add_trace(
-        go.Bar(
-            x=ohlcv.index,
-            y=ohlcv['volume'],
-            name='Volume',
-            marker_color=colors,
-            opacity=0.5
-        ),
-        row=2, col=1
-    )
-    # 차트 레이아웃 설정
-    fig.update_layout(
-        title='Trading Strategy Analysis',
-        yaxis_title='Price',
-        yaxis2_title='Volume',
-        xaxis_rangeslider_visible=False,
-        height=800,
-        showlegend=True,
-        legend=dict(
-            yanchor="top",
-            y=0.99,
-            xanchor="left",
-            x=0.01
-        )
-    )
 
-    # 차트 스타일 설정
-    fig.update_xaxes(gridcolor='lightgrey', gridwidth=0.5)
-    fig.update_yaxes(gridcolor='lightgrey', gridwidth=0.5)
-    
+@st.cache_resource(max_entries=128, ttl=CACHE_TTL, show_spinner=False)
+def load_shared_ohlcv(ticker, interval, version):
+    """모든 세션이 공유하는 OHLCV (읽기 전용으로 사용, version은 캐시 키 용도)"""
+    return load_ohlcv(ticker, interval, compact=True)
+
+
+@st.cache_resource(max_entries=64, ttl=CACHE_TTL, show_spinner=False)
+def analyze_shared(ticker, interval, version, params):
+    """모든 세션이 공유하는 (지표, 시그널) 분석 결과
+
+    시그널은 디스크 결과 캐시(재시작/다른 프로세스에서 계산한 결과 포함)에 있으면 그대로 쓰고
+    차트용 이동평균선만 계산한다.
+    """
+    ohlcv = load_shared_ohlcv(ticker, interval, version)
+    cache_key = (ticker, interval, version)
+    cached = result_cache.get(ticker, interval, version, params)
+    signals = cached.series(ohlcv.index) if cached is not None else None
+    if signals is not None:
+        indicators = strategy_indicators(ohlcv, params['ema_period'], params['ma_long_period'],
+                                         params['ma_mid_periods'], cache_key)
+        return indicators, signals
+    indicators, signals = analyze_strategy(ohlcv, **params, cache_key=cache_key)
+    result_cache.put(ticker, interval, version, params, signals)
+    return indicators, signals
+
+
+@st.cache_resource(max_entries=32, ttl=VERSION_TTL, show_spinner=False)
+def shared_data_versions(tickers, interval, marker):
+    """{티커: 데이터 버전} (재실행마다 전체 종목 파일을 확인하지 않도록 세션 간 공유, marker는 캐시 키 용도)"""
+    return {ticker: data_version(ticker, interval) for ticker in tickers}
+
+
+@st.cache_resource
+def shared_scan_cache():
+    return ScanCache(max_entries=256)
+
+
+@st.cache_resource(show_spinner=False)
+def load_signal_index(version):
+    """수집기가 미리 계산한 프리셋별 시그널 인덱스 (파일이 없으면 None, version은 캐시 키 용도)"""
+    if version is None:
+        return None
+    return SignalIndex.load(INDEX_PATH)
+
+
+def signal_index_version():
+    return os.stat(INDEX_PATH).st_mtime_ns if os.path.exists(INDEX_PATH) else None
+
+
+@st.cache_resource(show_spinner=False)
+def load_pattern_index(version):
+    """유사 차트 검색 인덱스 (파일이 없으면 전체 데이터로 만든다, version은 캐시 키 용도)"""
+    if version is None:
+        return PatternIndex.build()
+    return PatternIndex.load(PATTERN_INDEX_PATH)
+
+
+def pattern_index_version():
+    return os.stat(PATTERN_INDEX_PATH).st_mtime_ns if os.path.exists(PATTERN_INDEX_PATH) else None
+
+
+@st.cache_resource
+def shared_jobs(kind):
+    """스캔/분석을 스크립트 밖에서 실행하는 백그라운드 작업 실행기 (종류별로 하나, 모든 세션 공유)
+
+    오래 걸리는 전체 종목 스캔이 작업 스레드를 모두 차지해 종목 분석이 밀리지 않도록 kind('scan',
+    'analyze')마다 따로 둔다.
+    """
+    return JobRunner()
+
+
+def scan_job(job, tickers, interval, params, end_date, cache, cache_key):
+    """전체 종목 시그널 수 계산 작업 (끝나면 공유 스캔 캐시에 저장, 대체되면 중간에 멈춤)"""
+    counts = {}
+    with closing(scan_signal_counts(tickers, interval, params, end_date)) as scan:
+        for i, (ticker, count) in enumerate(scan):
+            if job.cancelled:
+                return None
+            counts[ticker] = count
+            job.report(i + 1, len(tickers), **{ticker: count})
+    cache.put(cache_key, counts)
+    return counts
+
+
+def analysis_job(job, ticker, interval, version, params):
+    return analyze_shared(ticker, interval, version, params)
+
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def watch_jobs():
+    """백그라운드 작업 진행 상황 표시, 기다리던 작업이 끝나면 페이지 전체를 다시 실행"""
+    jobs = [job for job in (st.session_state.scan_job, st.session_state.analysis_job) if job is not None]
+    if any(job.done for job in jobs):
+        st.rerun()
+    scan = st.session_state.scan_job
+    if scan is not None:
+        done, total = scan.progress
+        st.progress(done / total if total else 0., text=f'시그널 수 계산 중... ({done}/{total}, 이전 결과 표시 중)')
+    if st.session_state.analysis_job is not None:
+        st.caption('새 파라미터로 분석 중...')
+
+
+@st.cache_resource
+def shared_cache_state():
+    return {'last_update': last_update()}
+
+
+def sync_shared_cache():
+    """수집기가 저장소를 갱신했으면 공유 캐시 비우기"""
+    state = shared_cache_state()
+    current = last_update()
+    if state['last_update'] != current:
+        load_shared_ohlcv.clear()
+        analyze_shared.clear()
+        load_pattern_index.clear()
+        shared_scan_cache().clear()
+        indicator_cache.clear()
+        state['last_update'] = current
+
+
+@st.cache_resource
+def shared_profiler():
+    """프로세스 전체(모든 세션) 단계별 실행 시간"""
+    return Profiler()
+
+
+def session_profiler():
+    """세션별 단계별 실행 시간 (프로세스 전체 통계에도 함께 기록)"""
+    if 'profiler' not in st.session_state:
+        st.session_state.profiler = Profiler(parent=shared_profiler())
+    return st.session_state.profiler
+
+
+def show_profile_panel(profiler):
+    """개발자 패널: 마지막 재실행의 단계별 시간과 세션 누적 통계 (?dev=1 또는 CHARTMARK_DEV_PANEL=1)"""
+    with st.sidebar.expander('개발자: 단계별 실행 시간', expanded=True):
+        st.dataframe(pd.DataFrame({'ms': {name: seconds * 1000 for name, seconds in profiler.last_run.items()}}))
+        summary = pd.DataFrame(profiler.summary()).T[['count', 'mean_seconds', 'max_seconds']] * [1, 1000, 1000]
+        st.caption(f'세션 누적 ({profiler.runs}회 재실행, 평균/최대 ms)')
+        st.dataframe(summary.rename(columns={'mean_seconds': 'mean_ms', 'max_seconds': 'max_ms'}))
+        st.download_button('JSON 내보내기', profiler.to_json(), 'profile.json', 'application/json')
+        st.download_button('Prometheus 내보내기', shared_profiler().to_prometheus(), 'metrics.prom', 'text/plain')
+
+
+@timed('chart')
+def plot_analysis_streamlit(ohlcv, signals, indicators, ema_period, ma_long_period, ma_mid_periods):
+    # 차트 생성 (봉 수가 많으면 화면에 보낼 점 수를 제한, 시그널 봉은 원래 봉 그대로 유지)
+    fig = build_analysis_figure(ohlcv, signals, indicators, ema_period, ma_long_period, ma_mid_periods,
+                                name=st.session_state.current_ticker)
+
     # Streamlit에 차트 표시
     st.plotly_chart(fig, use_container_width=True)
 
-def calculate_signals_for_ticker(ticker, start_date, end_date, params):
-    """특정 티커의 시그널 수를 계산하는 함수"""
-    try:
-        stock = yf.Ticker(ticker)
-        data = stock.history(start=start_date, end=end_date)
-        if len(data) == 0:
-            return 0
-        data.columns = data.columns.str.lower()
-        
-        # 전략 분석
-        _, signals = analyze_strategy(
-            data,
-            tolerance=params['tolerance'],
-            compression_period=params['compression_period'],
-            compression_threshold=params['compression_threshold'],
-            ema_period=params['ema_period'],
-            ma_long_period=params['ma_long_period'],
-            ma_mid_periods=params['ma_mid_periods']
-        )
-        return int(signals.sum())
-    except:
-        return 0
+@timed('pattern_search')
+def show_pattern_search(ticker, interval, ohlcv):
+    """유사 차트 찾기: 선택한 구간과 z 정규화 종가 모양이 비슷한 구간을 전체 종목/캔들 주기에서 검색"""
+    with st.expander('유사 차트 찾기'):
+        local_index = ohlcv.index.tz_localize(None)
+        last = len(ohlcv) - 1
+        first, end = st.slider('질의 구간 (봉 번호)', 0, last, (max(0, last - 59), last), key='pattern_window')
+        st.caption(f'{local_index[first]} ~ {local_index[end]} ({end - first + 1}봉)')
+        col1, col2 = st.columns(2)
+        k = col1.slider('결과 수', 5, 30, 10, key='pattern_k')
+        same_interval = col2.checkbox('같은 캔들 주기만', key='pattern_same_interval')
+        if not st.button('유사 차트 검색', key='pattern_search') or end - first < 2:
+            return
+
+        with st.spinner('유사 차트 검색 중...'):
+            index = load_pattern_index(pattern_index_version())
+            intervals = [interval] if same_interval else None
+            if (ticker, interval) in index:
+                results = index.search_window(ticker, interval, ohlcv.index[first], ohlcv.index[end], k, intervals)
+            else:
+                query = ohlcv['close'].to_numpy(dtype=float)[first:end + 1]
+                results = index.search(query, k, intervals)
+        if results.empty:
+            st.info('비슷한 구간이 없습니다.')
+            return
+        st.dataframe(results)
+
+        # 질의 구간과 상위 3개 결과의 z 정규화 종가 비교
+        close = ohlcv['close'].to_numpy(dtype=float)[first:end + 1]
+        lines = {'query': pd.Series((close - close.mean()) / (close.std() or 1))}
+        for row in results.head(3).itertuples():
+            lines[f'{row.ticker} {row.interval} {row.start:%Y-%m-%d %H:%M}'] = pd.Series(index.normalized(
+                row.ticker, row.interval, row.start, row.bars))
+        st.line_chart(pd.DataFrame(lines))
+
 
 def get_valid_date_range(interval):
     """선택된 캔들 주기에 따른 유효한 날짜 범위 반환"""
-    today = datetime(2025, 2, 19, 13, 20, 37, 106915)
+    # 저장소는 증분 수집으로 계속 갱신되므로 현재 시각 기준
+    today = datetime.now()
     
     intervals = {
         "1m": {"days": 7, "default": 7-1},
@@ -177,6 +276,7 @@ def get_valid_date_range(interval):
 
 def main():
     st.title('주식 전략 분석기')
+    job_status = st.container()
     
     # 캔들 주기 선택
     st.sidebar.subheader('캔들 주기 설정')
@@ -244,67 +344,67 @@ def main():
         'ORCL': 'Oracle',
         'CSCO': 'Cisco',
         
-        # # 금융
-        # 'JPM': 'JPMorgan Chase',
-        # 'BAC': 'Bank of America',
-        # 'WFC': 'Wells Fargo',
-        # 'GS': 'Goldman Sachs',
-        # 'V': 'Visa',
-        # 'MA': 'Mastercard',
+        # 금융
+        'JPM': 'JPMorgan Chase',
+        'BAC': 'Bank of America',
+        'WFC': 'Wells Fargo',
+        'GS': 'Goldman Sachs',
+        'V': 'Visa',
+        'MA': 'Mastercard',
         
-        # # 소비재
-        # 'KO': 'Coca-Cola',
-        # 'PEP': 'PepsiCo',
-        # 'MCD': "McDonald's",
-        # 'SBUX': 'Starbucks',
-        # 'NKE': 'Nike',
-        # 'DIS': 'Disney',
-        # 'NFLX': 'Netflix',
-        # 'WMT': 'Walmart',
-        # 'COST': 'Costco',
-        # 'TGT': 'Target',
+        # 소비재
+        'KO': 'Coca-Cola',
+        'PEP': 'PepsiCo',
+        'MCD': "McDonald's",
+        'SBUX': 'Starbucks',
+        'NKE': 'Nike',
+        'DIS': 'Disney',
+        'NFLX': 'Netflix',
+        'WMT': 'Walmart',
+        'COST': 'Costco',
+        'TGT': 'Target',
         
-        # # 헬스케어
-        # 'JNJ': 'Johnson & Johnson',
-        # 'PFE': 'Pfizer',
-        # 'MRNA': 'Moderna',
-        # 'UNH': 'UnitedHealth',
-        # 'ABT': 'Abbott Laboratories',
+        # 헬스케어
+        'JNJ': 'Johnson & Johnson',
+        'PFE': 'Pfizer',
+        'MRNA': 'Moderna',
+        'UNH': 'UnitedHealth',
+        'ABT': 'Abbott Laboratories',
         
-        # # 통신
-        # 'T': 'AT&T',
-        # 'VZ': 'Verizon',
+        # 통신
+        'T': 'AT&T',
+        'VZ': 'Verizon',
         
-        # # 에너지
-        # 'XOM': 'ExxonMobil',
-        # 'CVX': 'Chevron',
+        # 에너지
+        'XOM': 'ExxonMobil',
+        'CVX': 'Chevron',
         
-        # # 산업재
-        # 'BA': 'Boeing',
-        # 'CAT': 'Caterpillar',
-        # 'GE': 'General Electric',
-        # 'MMM': '3M',
+        # 산업재
+        'BA': 'Boeing',
+        'CAT': 'Caterpillar',
+        'GE': 'General Electric',
+        'MMM': '3M',
         
-        # # 자동차
-        # 'F': 'Ford',
-        # 'GM': 'General Motors',
+        # 자동차
+        'F': 'Ford',
+        'GM': 'General Motors',
         
-        # # 반도체
-        # 'TSM': 'Taiwan Semiconductor',
-        # 'QCOM': 'Qualcomm',
-        # 'TXN': 'Texas Instruments',
+        # 반도체
+        'TSM': 'Taiwan Semiconductor',
+        'QCOM': 'Qualcomm',
+        'TXN': 'Texas Instruments',
         
-        # # 엔터테인먼트/게임
-        # 'EA': 'Electronic Arts',
-        # 'TTWO': 'Take-Two Interactive',
+        # 엔터테인먼트/게임
+        'EA': 'Electronic Arts',
+        'TTWO': 'Take-Two Interactive',
         
-        # # 기타 테크
-        # 'ZM': 'Zoom',
-        # 'UBER': 'Uber',
-        # 'ABNB': 'Airbnb',
-        # 'SQ': 'Block (Square)',
-        # 'PYPL': 'PayPal',
-        # 'SHOP': 'Shopify'
+        # 기타 테크
+        'ZM': 'Zoom',
+        'UBER': 'Uber',
+        'ABNB': 'Airbnb',
+        'SQ': 'Block (Square)',
+        'PYPL': 'PayPal',
+        'SHOP': 'Shopify'
     }
     
     # 설명 추가
@@ -342,23 +442,43 @@ def main():
     }
     
     # 캔들 주기가 변경되었거나 파라미터가 변경되었을 때 시그널 재계산
-    if st.session_state.last_interval != interval or \
-       st.session_state.last_params != current_params or \
-       not st.session_state.signal_counts:
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        
-        for i, ticker in enumerate(default_tickers.keys()):
-            status_text.text(f'분석 중... {ticker}')
-            count = calculate_signals_for_ticker(ticker, start_date, end_date, current_params)
-            st.session_state.signal_counts[ticker] = count
-            progress_bar.progress((i + 1) / len(default_tickers))
-        
-        status_text.empty()
-        progress_bar.empty()
-        st.session_state.last_params = current_params
-        st.session_state.last_interval = interval  # 현재 interval 저장
-    
+    # (다른 세션이 같은 조건으로 계산한 결과가 있으면 그대로 사용)
+    with stage('scan'):
+        sync_shared_cache()
+        versions = shared_data_versions(tuple(default_tickers), interval, last_update())
+        scan_key = (interval, tuple(current_params.items()), tuple(versions.values()))
+        shared_counts = shared_scan_cache().get(scan_key)
+        signal_index = load_signal_index(signal_index_version())
+        preset = signal_index.find_preset(current_params) if signal_index is not None else None
+        if shared_counts is None and preset is not None and signal_index.is_current(default_tickers, interval, versions):
+            # 미리 계산한 프리셋이면 계산 없이 조회
+            shared_counts = signal_index.counts(preset, interval, default_tickers)
+            shared_scan_cache().put(scan_key, shared_counts)
+        scan = st.session_state.scan_job
+        failed = False
+        if shared_counts is None and scan is not None and scan.done and scan.key == ('scan', scan_key):
+            # 같은 조건의 작업이 끝났는데 공유 캐시에 결과가 없다: 실패면 다시 제출하지 않고 오류 표시,
+            # 성공했지만 결과가 캐시에서 지워졌으면(수집기 갱신 후 캐시 비움, LRU 제거) 아래에서 다시 제출
+            failed = scan.status == 'failed'
+            if failed:
+                st.sidebar.error(f'시그널 수 계산 중 오류 발생: {scan.error}')
+            st.session_state.scan_job = scan = None
+        if shared_counts is not None:
+            st.session_state.signal_counts = dict(shared_counts)
+            st.session_state.last_params = current_params
+            st.session_state.last_interval = interval
+            if scan is not None:
+                shared_jobs('scan').release(scan)
+                st.session_state.scan_job = None
+        elif not failed and (st.session_state.last_interval != interval or
+                             st.session_state.last_params != current_params or
+                             not st.session_state.signal_counts):
+            # 티커별 분석은 백그라운드 작업에서 프로세스 풀로 실행하고, 끝날 때까지 이전 결과를 표시
+            # (같은 조건의 작업이 이미 있으면 공유하고, 이전 조건의 작업은 취소)
+            st.session_state.scan_job = shared_jobs('scan').submit(
+                ('scan', scan_key), scan_job, list(default_tickers), interval, current_params, end_date,
+                shared_scan_cache(), scan_key, previous=scan)
+
     # 시그널 수에 따라 티커 정렬
     sorted_tickers = sorted(
         default_tickers.keys(),
@@ -398,6 +518,7 @@ def main():
 
 
     # 세션 상태 체크를 티커 변경도 포함하도록 수정
+    version = data_version(ticker, interval)
     if st.session_state.ohlcv_data is None or \
        (st.session_state.start_date != start_date or \
         st.session_state.end_date != end_date or \
@@ -405,17 +526,15 @@ def main():
         st.session_state.current_interval != interval):
         try:
             with st.spinner('데이터를 불러오는 중...'):
-                # 로컬 데이터 경로 설정
-                data_path = f'data/{ticker}_{interval}_{start_date.strftime("%Y%m%d")}_{end_date.strftime("%Y%m%d")}.csv'
-                
                 try:
-                    # 로컬에서 데이터 불러오기 시도
-                    st.session_state.ohlcv_data = pd.read_csv(data_path, index_col=0, parse_dates=True)
-                    #st.info(f'로컬 데이터를 불러왔습니다: {data_path}')
+                    # 로컬 저장소(Parquet, 없으면 CSV)에서 OHLCV만 float32/int64로 불러오기 (세션 간 공유)
+                    # yfinance 제한으로 날짜 선택이 불가능하므로 저장된 기간 전체를 사용
+                    with stage('load'):
+                        st.session_state.ohlcv_data = load_shared_ohlcv(ticker, interval, version)
                 except FileNotFoundError:
                     # 로컬 데이터가 없는 경우 yfinance에서 데이터 가져오기
                     st.warning('로컬 데이터가 없어 yfinance에서 데이터를 가져와야합니다.')
-                    
+                    return
 
                 # stock = yf.Ticker(ticker)
                 # st.session_state.ohlcv_data = stock.history(
@@ -427,7 +546,6 @@ def main():
                 if len(st.session_state.ohlcv_data) == 0:
                     st.error(f'데이터가 없습니다: {ticker}')
                     return
-                st.session_state.ohlcv_data.columns = st.session_state.ohlcv_data.columns.str.lower()
                 st.session_state.start_date = start_date
                 st.session_state.end_date = end_date
                 st.session_state.current_ticker = ticker
@@ -439,43 +557,74 @@ def main():
     # 데이터가 있으면 분석 실행
     if st.session_state.ohlcv_data is not None:
         try:
-            # 전략 분석
-            ohlcv, signals = analyze_strategy(
-                st.session_state.ohlcv_data.copy(),
-                tolerance=tolerance,
-                compression_period=compression_period,
-                compression_threshold=compression_threshold,
-                ema_period=ema_period,
-                ma_long_period=ma_long_period,
-                ma_mid_periods=ma_mid_periods
-            )
-            
-            # 시그널 통계
-            total_signals = signals.sum()
-            st.sidebar.metric("발견된 시그널 수", total_signals)
-            
-            # 차트 표시
-            plot_analysis_streamlit(ohlcv, signals, ema_period, ma_long_period, ma_mid_periods)
-            
-            # 시그널 날짜 표시
-            if total_signals > 0:
-                st.subheader('시그널 발생 날짜')
-                signal_dates = []
-                for idx in ohlcv[signals].index:
-                    try:
-                        # datetime 객체로 변환 시도
-                        if isinstance(idx, str):
-                            date_str = pd.to_datetime(idx).strftime('%Y-%m-%d')
-                        else:
-                            date_str = idx.strftime('%Y-%m-%d')
-                        signal_dates.append(date_str)
-                    except:
-                        # 변환 실패시 문자열 그대로 사용
-                        signal_dates.append(str(idx))
-                st.write(signal_dates)
-                
+            # 전략 분석 (같은 데이터/파라미터의 결과는 세션 간 공유, 공유 데이터는 변경하지 않는다)
+            ohlcv = st.session_state.ohlcv_data
+            # 분석은 백그라운드 작업으로 실행하고, 바로 끝나지 않으면 같은 데이터의 이전 결과를 먼저 그린다
+            with stage('analyze'):
+                job = shared_jobs('analyze').submit(
+                    ('analyze', ticker, interval, version, tuple(current_params.items())), analysis_job,
+                    ticker, interval, version, current_params, previous=st.session_state.analysis_job, coalesce=0)
+                last = st.session_state.last_analysis
+                stale = last is not None and last[0] == (ticker, interval, version)
+                if job.wait(ANALYSIS_WAIT_SECONDS if stale else ANALYSIS_TIMEOUT_SECONDS):
+                    st.session_state.analysis_job = None
+                    if job.status == 'failed':
+                        raise job.error
+                    analysis = (current_params, job.result)
+                    st.session_state.last_analysis = ((ticker, interval, version),) + analysis
+                else:
+                    st.session_state.analysis_job = job
+                    analysis = last[1:] if stale else None
+
+            if analysis is None:
+                # 다른 작업에 밀려 바로 끝나지 않으면 진행 중으로 표시 (끝나면 watch_jobs가 다시 그림)
+                st.info('분석 중입니다... 끝나면 자동으로 표시됩니다.')
+            else:
+                params, (indicators, signals) = analysis
+                # 시그널 통계
+                total_signals = signals.sum()
+                st.sidebar.metric("발견된 시그널 수", total_signals)
+
+                # 차트 표시 구간 선택 (구간을 좁히면 해당 구간을 원래 해상도로 다시 그림)
+                local_index = ohlcv.index.tz_localize(None)
+                first, last = local_index[0].to_pydatetime(), local_index[-1].to_pydatetime()
+                if len(ohlcv) > MAX_CHART_POINTS:
+                    first, last = st.slider('차트 표시 구간', min_value=first, max_value=last, value=(first, last))
+                view, view_signals, view_indicators = visible_slice(ohlcv, signals, indicators, first, last)
+                plot_analysis_streamlit(view, view_signals, view_indicators, params['ema_period'],
+                                        params['ma_long_period'], params['ma_mid_periods'])
+                show_pattern_search(ticker, interval, ohlcv)
+
+                # 시그널 날짜 표시
+                if total_signals > 0:
+                    st.subheader('시그널 발생 날짜')
+                    signal_dates = format_signal_dates(ohlcv.index[signals.to_numpy()])
+                    st.write(signal_dates)
+
+                    # 시그널 봉 종가에 진입했을 때 봉 수별 이후 수익률
+                    st.subheader('시그널 이후 수익률')
+                    with stage('backtest'):
+                        returns = summarize(forward_returns(ohlcv, signals))
+                    st.dataframe(returns)
+
         except Exception as e:
             st.error(f'분석 중 오류 발생: {str(e)}')
 
+    # 백그라운드 작업이 남아 있으면 진행 상황을 표시하고 끝나면 다시 그린다
+    if st.session_state.scan_job is not None or st.session_state.analysis_job is not None:
+        with job_status:
+            watch_jobs()
+
 if __name__ == "__main__":
-    main() 
+    # 재실행마다 단계별 실행 시간 기록 (CHARTMARK_METRICS_FILE이 있으면 Prometheus 텍스트로 저장)
+    profiler = session_profiler()
+    profiler.start_run()
+    try:
+        main()
+    finally:
+        profiler.finish_run()
+        if os.environ.get('CHARTMARK_METRICS_FILE'):
+            shared_profiler().write_prometheus(os.environ['CHARTMARK_METRICS_FILE'])
+    if st.query_params.get('dev') == '1' or os.environ.get('CHARTMARK_DEV_PANEL') == '1':
+        show_profile_panel(profiler)
+
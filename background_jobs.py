@@ -0,0 +1,119 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# 연속으로 바뀌는 파라미터(슬라이더 드래그)를 하나로 합치기 위해 작업 시작 전에 기다리는 시간
+COALESCE_SECONDS = 0.15
+
+
+class Job:
+    """백그라운드 작업 하나의 상태와 결과
+
+    status는 pending(대기) -> running -> done / failed / cancelled 순으로 바뀐다. 작업 함수는
+    첫 인자로 Job을 받아 report()로 진행 상황과 중간 결과를 알리고, 오래 걸리는 반복 중간에
+    cancelled를 확인해 멈춘다.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.status = 'pending'
+        self.result = None
+        self.error = None
+        self.progress = (0, 0)
+        self.partial = {}
+        self.submitted = time.perf_counter()
+        self.finished = None
+        self.owners = 0
+        self._cancel = threading.Event()
+        self._done = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def wait(self, timeout=None):
+        """끝날 때까지(또는 timeout초) 기다리고 끝났는지 반환"""
+        return self._done.wait(timeout)
+
+    def report(self, done, total, **partial):
+        """진행 상황(done/total)과 중간 결과 갱신"""
+        self.partial.update(partial)
+        self.progress = (done, total)
+
+    def _finish(self, status, result=None, error=None):
+        self.status, self.result, self.error = status, result, error
+        self.finished = time.perf_counter()
+        self._done.set()
+
+
+class JobRunner:
+    """키별로 하나씩 백그라운드 스레드에서 실행하는 작업 실행기 (모든 세션이 공유)
+
+    같은 키로 다시 제출하면 실행 중인 작업을 그대로 돌려주고(여러 세션/재실행이 같은 계산을 공유),
+    previous로 넘긴 이전 작업은 더 이상 기다리는 곳이 없으면 취소한다. 작업은 coalesce초 기다린 뒤
+    시작하므로 그 사이에 새 파라미터로 대체된 작업은 계산 없이 끝난다. 끝난 작업은 목록에서 빠지고,
+    결과는 작업을 들고 있는 쪽(세션 상태)과 각 작업이 쓰는 공유 캐시에 남는다.
+    """
+
+    def __init__(self, max_workers=2, coalesce=COALESCE_SECONDS):
+        self.coalesce = coalesce
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='chartmark-job')
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, function, *args, previous=None, coalesce=None, **kwargs):
+        """function(job, *args, **kwargs)를 key 작업으로 실행 (같은 키가 실행 중이면 그 작업 반환)
+
+        coalesce로 이 작업의 시작 대기 시간을 바꿀 수 있다 (짧은 작업은 0).
+        """
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None or job.cancelled:
+                job = Job(key)
+                self._jobs[key] = job
+                delay = self.coalesce if coalesce is None else coalesce
+                self._pool.submit(self._run, job, delay, function, args, kwargs)
+            if previous is not job:
+                job.owners += 1
+                if previous is not None:
+                    self._release(previous)
+        return job
+
+    def release(self, job):
+        """작업을 더 기다리지 않음 (기다리는 곳이 없으면 취소)"""
+        with self._lock:
+            self._release(job)
+
+    def _release(self, job):
+        job.owners -= 1
+        if job.owners <= 0 and not job.done:
+            job.cancel()
+            if self._jobs.get(job.key) is job:
+                del self._jobs[job.key]
+
+    def running(self):
+        """실행 중이거나 대기 중인 작업 키 목록"""
+        with self._lock:
+            return list(self._jobs)
+
+    def _run(self, job, delay, function, args, kwargs):
+        try:
+            if job.cancelled or (delay > 0 and job._cancel.wait(delay)):
+                job._finish('cancelled')
+                return
+            job.status = 'running'
+            result = function(job, *args, **kwargs)
+            job._finish('cancelled' if job.cancelled else 'done', result)
+        except Exception as e:
+            job._finish('failed', error=e)
+        finally:
+            with self._lock:
+                if self._jobs.get(job.key) is job:
+                    del self._jobs[job.key]
@@ -0,0 +1,136 @@
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from data_store import list_keys
+from batch_strategy import UniverseArrays, analyze_universe
+
+HORIZONS = (1, 5, 10, 20)
+
+
+def _gather_returns(close, rows, positions, horizons):
+    """(티커 x 봉) 종가 행렬에서 시그널 위치별 horizon 봉 뒤 수익률 계산 (데이터 밖이면 NaN)"""
+    width = close.shape[1]
+    entry = close[rows, positions]
+    returns = {}
+    for horizon in horizons:
+        exit_positions = positions + horizon
+        valid = exit_positions < width
+        exit_price = np.full(len(positions), np.nan)
+        exit_price[valid] = close[rows[valid], exit_positions[valid]]
+        returns[f'return_{horizon}'] = exit_price / entry - 1
+    return returns
+
+
+def forward_returns(ohlcv, signals, horizons=HORIZONS):
+    """시그널 봉 종가에 진입했을 때 horizon 봉 뒤 종가까지의 수익률
+
+    반환값은 시그널 시각을 인덱스로, return_<horizon> 컬럼을 가진 데이터.
+    """
+    close = ohlcv['close'].to_numpy(dtype=float)[None, :]
+    positions = np.flatnonzero(np.asarray(signals, dtype=bool))
+    returns = _gather_returns(close, np.zeros(len(positions), dtype=np.int64), positions, horizons)
+    return pd.DataFrame(returns, index=ohlcv.index[positions])
+
+
+def equity_curve(close, signals, holding=HORIZONS[-1]):
+    """시그널 다음 봉부터 holding 봉 동안 보유하는 단순 전략의 누적 수익 곡선과 낙폭
+
+    close/signals는 (봉,) 또는 (티커 x 봉) 배열. 보유 중인 시그널이 하나라도 있으면 그 봉의 수익률을
+    그대로 받는다 (1배 노출, 겹친 시그널은 보유 기간만 늘린다). 반환값은 (equity, drawdown) 배열.
+    """
+    close = np.atleast_2d(np.asarray(close, dtype=float))
+    signals = np.atleast_2d(np.asarray(signals, dtype=bool))
+    bars = close.shape[1]
+
+    # 진입(+1)/청산(-1) 표시의 누적합 = 보유 중인 시그널 수
+    changes = np.zeros((close.shape[0], bars + holding + 1), dtype=np.int32)
+    rows, positions = np.nonzero(signals)
+    np.add.at(changes, (rows, positions + 1), 1)
+    np.add.at(changes, (rows, positions + holding + 1), -1)
+    in_market = np.cumsum(changes, axis=1)[:, :bars] > 0
+
+    bar_returns = np.zeros_like(close)
+    bar_returns[:, 1:] = close[:, 1:] / close[:, :-1] - 1
+    bar_returns = np.where(in_market & np.isfinite(bar_returns), bar_returns, 0.)
+    equity = np.cumprod(1 + bar_returns, axis=1)
+    drawdown = equity / np.maximum.accumulate(equity, axis=1) - 1
+    return equity, drawdown
+
+
+def summarize(returns):
+    """horizon별 시그널 수, 평균/중앙값 수익률, 승률(수익률 > 0)"""
+    rows = {}
+    for column in [c for c in returns.columns if c.startswith('return_')]:
+        values = returns[column].dropna()
+        rows[int(column[len('return_'):])] = {
+            'signals': len(values),
+            'mean_return': values.mean(),
+            'median_return': values.median(),
+            'win_rate': (values > 0).mean() if len(values) else np.nan,
+        }
+    return pd.DataFrame.from_dict(rows, orient='index').rename_axis('horizon')
+
+
+def backtest_universe(universe, signals, horizons=HORIZONS, holding=None):
+    """전체 티커의 시그널 행렬을 한 번에 평가
+
+    universe는 batch_strategy.UniverseArrays, signals는 analyze_universe의 (티커 x 봉) 시그널 행렬.
+    반환값 dict:
+      trades: 시그널별 (ticker, time, return_<horizon>...)
+      summary: horizon별 요약 (summarize)
+      by_ticker: 티커별 시그널 수, 승률, 최종 누적 수익, 최대 낙폭
+    """
+    holding = holding or horizons[-1]
+    rows, positions = np.nonzero(signals)
+    returns = _gather_returns(universe.close, rows, positions, horizons)
+    trades = pd.DataFrame({
+        'ticker': np.asarray(universe.tickers, dtype=object)[rows],
+        'time': pd.DatetimeIndex(universe.times[rows, positions], tz='UTC'),
+        **returns,
+    })
+
+    equity, drawdown = equity_curve(universe.close, signals, holding)
+    win = f'return_{holding}' if holding in horizons else f'return_{horizons[-1]}'
+    by_ticker = pd.DataFrame({
+        'signals': np.bincount(rows, minlength=len(universe.tickers)),
+        'win_rate': trades.groupby('ticker')[win].apply(lambda r: (r.dropna() > 0).mean()).reindex(universe.tickers),
+        'total_return': equity[:, -1] - 1 if equity.shape[1] else np.nan,
+        'max_drawdown': drawdown.min(axis=1) if drawdown.shape[1] else np.nan,
+    }, index=pd.Index(universe.tickers, name='ticker'))
+    return {'trades': trades, 'summary': summarize(trades), 'by_ticker': by_ticker}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='시그널 이후 수익률 백테스트 (전체 종목 일괄)')
+    parser.add_argument('--intervals', default='1d', help='쉼표로 구분한 캔들 주기')
+    parser.add_argument('--horizons', default=','.join(map(str, HORIZONS)), help='쉼표로 구분한 보유 봉 수')
+    parser.add_argument('--tolerance', type=float, default=1e-6)
+    parser.add_argument('--compression-period', type=int, default=20)
+    parser.add_argument('--compression-threshold', type=float, default=0.05)
+    args = parser.parse_args()
+    params = dict(tolerance=args.tolerance, compression_period=args.compression_period,
+                  compression_threshold=args.compression_threshold)
+    horizons = tuple(int(h) for h in args.horizons.split(','))
+
+    keys = list_keys()
+    for interval in args.intervals.split(','):
+        universe = UniverseArrays.load(sorted(t for t, i in keys if i == interval), interval)
+        if not universe.tickers:
+            print(f"{interval}: no data")
+            continue
+        signals, _ = analyze_universe(universe, **params)
+
+        start = time.perf_counter()
+        result = backtest_universe(universe, signals, horizons)
+        elapsed = time.perf_counter() - start
+
+        print(f"\n{interval}: {len(universe.tickers)} tickers, {len(result['trades'])} signals, "
+              f"backtest {elapsed * 1000:.1f}ms")
+        print(result['summary'].to_string(float_format=lambda v: f'{v:.4f}'))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from data_store import load_ohlcv, list_keys
+from indicators import moving_averages, bar_seconds
+
+
+class UniverseArrays:
+    """한 캔들 주기의 여러 티커 OHLCV를 (티커 x 봉) 2차원 배열로 정렬한 데이터
+
+    티커마다 봉 수가 다르므로 마지막 봉을 기준으로 오른쪽 정렬하고, 앞쪽 빈 칸은 NaN(시각은 NaT)으로 채운다.
+    offsets[i]는 i번째 티커의 첫 실제 봉 위치.
+    """
+
+    def __init__(self, frames):
+        self.tickers = list(frames)
+        lengths = np.array([len(frames[ticker]) for ticker in self.tickers], dtype=np.int64)
+        width = int(lengths.max()) if len(lengths) else 0
+        self.offsets = width - lengths
+
+        shape = (len(self.tickers), width)
+        self.open, self.high, self.low, self.close = (np.full(shape, np.nan) for _ in range(4))
+        self.times = np.full(shape, np.datetime64('NaT'), dtype='datetime64[ns]')
+        for row, ticker in enumerate(self.tickers):
+            frame = frames[ticker]
+            start = self.offsets[row]
+            for name in ('open', 'high', 'low', 'close'):
+                getattr(self, name)[row, start:] = frame[name].to_numpy(dtype=float)
+            index = frame.index
+            if isinstance(index, pd.DatetimeIndex) and index.tz is not None:
+                index = index.tz_convert('UTC').tz_localize(None)
+            self.times[row, start:] = index.to_numpy(dtype='datetime64[ns]')
+
+    @classmethod
+    def load(cls, tickers, interval, end=None):
+        """저장소에서 티커들을 불러와 정렬 (데이터가 없는 티커는 제외)"""
+        frames = {}
+        for ticker in tickers:
+            try:
+                data = load_ohlcv(ticker, interval, end=end, compact=True)
+            except FileNotFoundError:
+                continue
+            if len(data):
+                frames[ticker] = data
+        return cls(frames)
+
+    def row_index(self, row):
+        """row번째 티커의 실제 봉 시각 (UTC)"""
+        return pd.DatetimeIndex(self.times[row, self.offsets[row]:], tz='UTC')
+
+
+def _by_column(values, method):
+    """(티커 x 봉) 배열을 티커별 열로 바꿔 pandas 연산을 적용한 뒤 다시 (티커 x 봉)으로 반환
+
+    티커 하나에 대해 계산하는 것과 같은 cython 루틴을 열마다 실행하므로 결과가 같다.
+    """
+    return method(pd.DataFrame(values.T)).to_numpy().T
+
+
+def universe_conditions(universe, tolerance=0.0001, compression_period=20, compression_threshold=0.02,
+                        ema_period=120, ma_long_period=111, ma_mid_periods=(25, 33, 49)):
+    """전체 티커에 대해 analyze_strategy의 이동평균선과 조건 1~3을 한 번에 계산
+
+    반환값은 (moving_averages 결과 {('EMA' | 'MA', 기간): (이동평균, 기울기)},
+    (조건1, 조건2, 조건3) (티커 x 봉, bool) 배열).
+    """
+    close = universe.close
+    # 이동평균선과 기울기는 analyze_strategy와 같은 indicators 커널로 전체 티커를 한 번에 계산
+    # (봉 사이 시간은 앞쪽 빈 칸이 끼면 NaN)
+    averages = moving_averages(close, bar_seconds(universe.times), ema_periods=[ema_period],
+                               sma_periods=(ma_long_period,) + tuple(ma_mid_periods))
+    slopes = [averages[('EMA', ema_period)][1]] + [averages[('MA', period)][1]
+                                                   for period in (ma_long_period,) + tuple(ma_mid_periods)]
+
+    # 조건 1: EMA와 장기 MA가 평행
+    condition1 = np.abs(slopes[0] - slopes[1]) < tolerance
+
+    # 조건 2: 모든 이동평균선이 양의 기울기
+    condition2 = np.logical_and.reduce([slope > 0 for slope in slopes])
+
+    # 조건 3: 눌림목 (직전 종가/이전 고점보다 낮은 시가)
+    previous_high = np.full_like(close, np.nan)
+    previous_high[:, 1:] = _by_column(universe.high, lambda frame: frame.rolling(
+        window=compression_period, min_periods=1).max())[:, :-1]
+    previous_close = np.full_like(close, np.nan)
+    previous_close[:, 1:] = close[:, :-1]
+    condition3 = (universe.open < previous_close * (1 - compression_threshold)) & (universe.open < previous_high)
+    # 티커별로 처음 compression_period개 봉은 시그널 없음
+    positions = np.arange(close.shape[1])
+    condition3 &= positions >= (universe.offsets + compression_period)[:, None]
+    return averages, (condition1, condition2, condition3)
+
+
+def analyze_universe(universe, tolerance=0.0001, compression_period=20, compression_threshold=0.02,
+                     ema_period=120, ma_long_period=111, ma_mid_periods=(25, 33, 49)):
+    """전체 티커에 대해 analyze_strategy의 조건 1~3을 한 번에 계산
+
+    반환값은 (시그널 행렬 (티커 x 봉, bool), 티커별 시그널 수 Series).
+    각 행의 결과는 같은 데이터로 analyze_strategy를 실행한 결과와 같다.
+    """
+    _, (condition1, condition2, condition3) = universe_conditions(
+        universe, tolerance, compression_period, compression_threshold, ema_period, ma_long_period, ma_mid_periods)
+    signals = condition1 & condition2 & condition3
+    counts = pd.Series(signals.sum(axis=1), index=universe.tickers, dtype=np.int64)
+    return signals, counts
+
+
+def scan_universe_counts(tickers, interval, params, end_date=None):
+    """여러 티커의 시그널 수를 한 번의 배열 연산으로 계산 ({티커: 시그널 수}, 데이터 없는 티커는 0)"""
+    universe = UniverseArrays.load(tickers, interval, end=end_date)
+    counts = dict.fromkeys(tickers, 0)
+    if universe.tickers:
+        _, found = analyze_universe(universe, **params)
+        counts.update(found.to_dict())
+    return counts
+
+
+def main():
+    """캔들 주기별 일괄 계산 시간과 티커별 analyze_strategy 결과 비교"""
+    from strategy_analysis import analyze_strategy
+
+    parser = argparse.ArgumentParser(description='전체 티커 일괄 시그널 계산')
+    parser.add_argument('--intervals', default='1d', help='쉼표로 구분한 캔들 주기')
+    parser.add_argument('--tickers', help='쉼표로 구분한 티커 (기본: 저장된 전체 티커)')
+    args = parser.parse_args()
+    params = dict(tolerance=1e-6, compression_period=20, compression_threshold=0.05,
+                  ema_period=120, ma_long_period=111, ma_mid_periods=(25, 33, 49))
+
+    keys = list_keys()
+    for interval in args.intervals.split(','):
+        tickers = args.tickers.split(',') if args.tickers else sorted(t for t, i in keys if i == interval)
+        universe = UniverseArrays.load(tickers, interval)
+        if not universe.tickers:
+            print(f"{interval}: no data")
+            continue
+
+        start = time.perf_counter()
+        signals, counts = analyze_universe(universe, **params)
+        batch_seconds = time.perf_counter() - start
+
+        frames = [load_ohlcv(ticker, interval, compact=True) for ticker in universe.tickers]
+        start = time.perf_counter()
+        results = [analyze_strategy(data, **params)[1] for data in frames]
+        single_seconds = time.perf_counter() - start
+        identical = all(np.array_equal(signals[row, universe.offsets[row]:], expected.to_numpy())
+                        for row, expected in enumerate(results))
+
+        print(f"{interval}: {len(universe.tickers)} tickers x {signals.shape[1]} bars, "
+              f"{int(counts.sum())} signals, batch {batch_seconds * 1000:.1f}ms, "
+              f"per-ticker {single_seconds * 1000:.1f}ms, identical: {identical}")
+
+
+if __name__ == "__main__":
+    main()
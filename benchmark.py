@@ -0,0 +1,243 @@
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+import tracemalloc
+
+import pandas as pd
+
+from data_store import load_ohlcv, read_csv, find_csv_files, list_keys
+from strategy_analysis import analyze_strategy, indicator_cache
+from signal_scan import calculate_signals_for_ticker
+from chart_builder import build_analysis_figure, format_signal_dates
+
+INTERVALS = ["1m", "2m", "5m", "15m", "30m", "60m", "90m", "1h",
+             "1d", "5d", "1wk", "1mo", "3mo"]
+DEFAULT_TICKERS = ['AAPL', 'NVDA', 'TSLA']
+DEFAULT_PARAMS = dict(tolerance=1e-6, compression_period=20, compression_threshold=0.05,
+                      ema_period=120, ma_long_period=111, ma_mid_periods=(25, 33, 49))
+# 시작 시간 측정 대상과, 시작할 때 불러오지 않아야 하는 무거운 모듈
+# (plotly.graph_objects는 Streamlit이 먼저 불러오지만 하위 모듈은 처음 사용할 때 로드된다)
+IMPORT_MODULES = ['app']
+HEAVY_MODULES = ['yfinance', 'ta', 'plotly.subplots']
+# -X importtime 출력에서 측정 스크립트 자체의 준비 단계와 대상 모듈을 구분하는 표시
+_IMPORT_MARKER = '--- import start ---'
+
+
+def _stage_csv_load(ticker, interval, data, params):
+    for path in find_csv_files(ticker, interval):
+        read_csv(path)
+
+
+def _stage_store_load(ticker, interval, data, params):
+    load_ohlcv(ticker, interval, compact=True)
+
+
+def _stage_analyze(ticker, interval, data, params):
+    analyze_strategy(data, **params)
+
+
+def _stage_ticker_signals(ticker, interval, data, params):
+    # 캐시 적중이 아닌 처음 계산 비용을 측정 (디스크 결과 캐시도 사용하지 않음)
+    indicator_cache.clear()
+    calculate_signals_for_ticker(ticker, interval, params, cache=None)
+
+
+def _stage_chart(ticker, interval, data, params):
+    indicators, signals = analyze_strategy(data, **params)
+    fig = build_analysis_figure(data, signals, indicators, params['ema_period'],
+                                params['ma_long_period'], params['ma_mid_periods'], name=ticker)
+    format_signal_dates(data.index[signals.to_numpy()])
+    fig.to_json()
+
+
+STAGES = {
+    'csv_load': _stage_csv_load,
+    'store_load': _stage_store_load,
+    'analyze_strategy': _stage_analyze,
+    'calculate_signals_for_ticker': _stage_ticker_signals,
+    'chart': _stage_chart,
+}
+
+
+def measure(stage, ticker, interval, data, params, repeat):
+    """한 단계의 (최소 실행 시간, 최대 메모리 사용량) 측정
+
+    시간은 tracemalloc 없이 repeat번 실행한 값 중 최솟값, 메모리는 별도 1회 실행으로 측정한다.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        stage(ticker, interval, data, params)
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    stage(ticker, interval, data, params)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(times), peak
+
+
+def run_benchmarks(tickers=None, intervals=None, stages=None, params=None, repeat=3):
+    """단계 x 캔들 주기별 실행 시간, 최대 메모리, 초당 처리 봉 수 측정"""
+    tickers = tickers or DEFAULT_TICKERS
+    intervals = intervals or INTERVALS
+    stages = stages or list(STAGES)
+    params = params or DEFAULT_PARAMS
+    available = set(list_keys())
+
+    # Plotly 등 처음 한 번만 드는 초기화 비용은 측정에서 제외
+    ticker, interval = next((t, i) for i in intervals for t in tickers if (t, i) in available)
+    warmup = load_ohlcv(ticker, interval, compact=True)
+    for name in stages:
+        STAGES[name](ticker, interval, warmup, params)
+
+    results = {}
+    for name in stages:
+        results[name] = {}
+        for interval in intervals:
+            seconds, peak, rows = 0.0, 0, 0
+            for ticker in tickers:
+                if (ticker, interval) not in available:
+                    continue
+                data = load_ohlcv(ticker, interval, compact=True)
+                elapsed, memory = measure(STAGES[name], ticker, interval, data, params, repeat)
+                seconds += elapsed
+                peak = max(peak, memory)
+                rows += len(data)
+            if rows:
+                results[name][interval] = {
+                    'seconds': seconds,
+                    'peak_bytes': peak,
+                    'rows': rows,
+                    'rows_per_second': rows / max(seconds, 1e-9),
+                }
+    return {
+        'meta': {
+            'tickers': tickers,
+            'params': {k: list(v) if isinstance(v, tuple) else v for k, v in params.items()},
+            'repeat': repeat,
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'machine': platform.machine(),
+        },
+        'results': results,
+    }
+
+
+def import_time(module, repeat=3):
+    """새 인터프리터에서 module을 불러오는 시간 (-X importtime)
+
+    반환값 dict: seconds(repeat번 중 최소), modules(가장 빨랐던 실행의 최상위 모듈별 누적 초),
+    heavy(불러온 뒤 로드되어 있던 HEAVY_MODULES). 모듈 import만 측정하므로 app은 의존 모듈과
+    최상위 코드(세션 상태 초기화, 캐시 함수 정의)까지이며 main()으로 화면을 그리는 시간은 들어가지 않는다.
+    """
+    code = (f"import sys, json, time\n"
+            f"sys.stderr.write({_IMPORT_MARKER!r} + '\\n')\n"
+            f"start = time.perf_counter()\n"
+            f"import {module}\n"
+            f"print(json.dumps([time.perf_counter() - start, "
+            f"[m for m in {HEAVY_MODULES!r} if m in sys.modules]]))\n")
+    best = None
+    for _ in range(repeat):
+        run = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                             capture_output=True, text=True, check=True)
+        seconds, heavy = json.loads(run.stdout.strip().splitlines()[-1])
+        if best is not None and seconds >= best['seconds']:
+            continue
+        modules = {}
+        lines = run.stderr.splitlines()
+        for line in lines[lines.index(_IMPORT_MARKER) + 1:]:
+            if not line.startswith('import time:'):
+                continue
+            _, cumulative, name = line[len('import time:'):].split('|')
+            # 들여쓰기가 없는(최상위) 모듈만: 하위 모듈 시간은 누적 시간에 포함된다
+            if name.startswith('   ') and not name.startswith('    '):
+                modules[name.strip()] = int(cumulative) / 1e6
+        best = {'seconds': seconds, 'modules': modules, 'heavy': heavy}
+    return best
+
+
+def compare(current, baseline, threshold=0.25, min_seconds=0.005):
+    """기준 결과보다 threshold 비율 이상 느려진 (단계, 캔들 주기) 목록 반환
+
+    min_seconds보다 짧은 측정은 잡음이 커서 비교하지 않는다.
+    """
+    regressions = []
+    for name, by_interval in current['results'].items():
+        for interval, result in by_interval.items():
+            base = baseline.get('results', {}).get(name, {}).get(interval)
+            if base is None or base['seconds'] < min_seconds:
+                continue
+            ratio = result['seconds'] / base['seconds']
+            if ratio > 1 + threshold:
+                regressions.append((name, interval, base['seconds'], result['seconds'], ratio))
+    for module, result in current.get('import_time', {}).items():
+        base = baseline.get('import_time', {}).get(module)
+        if base is None:
+            continue
+        ratio = result['seconds'] / base['seconds']
+        if ratio > 1 + threshold:
+            regressions.append(('import', module, base['seconds'], result['seconds'], ratio))
+    return regressions
+
+
+def print_report(report):
+    print(f"{'stage':<30} {'interval':>8} {'rows':>8} {'time (ms)':>10} {'peak (MB)':>10} {'rows/s':>12}")
+    for name, by_interval in report['results'].items():
+        for interval, result in by_interval.items():
+            print(f"{name:<30} {interval:>8} {result['rows']:>8} {result['seconds'] * 1000:>10.1f} "
+                  f"{result['peak_bytes'] / 1e6:>10.1f} {result['rows_per_second']:>12,.0f}")
+    for module, result in report.get('import_time', {}).items():
+        print(f"\nimport {module}: {result['seconds'] * 1000:.0f}ms "
+              f"(heavy modules loaded: {', '.join(result['heavy']) or 'none'})")
+        slowest = sorted(result['modules'].items(), key=lambda item: -item[1])[:10]
+        for name, seconds in slowest:
+            print(f"  {name:<28} {seconds * 1000:>10.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='전략/로딩/차트 단계별 성능 측정')
+    parser.add_argument('--tickers', help=f"쉼표로 구분한 티커 (기본: {','.join(DEFAULT_TICKERS)}, 'all'은 전체)")
+    parser.add_argument('--intervals', help='쉼표로 구분한 캔들 주기 (기본: 전체 13개)')
+    parser.add_argument('--stages', help=f"쉼표로 구분한 단계 ({','.join(STAGES)})")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default='benchmark_results.json', help='결과 JSON 파일')
+    parser.add_argument('--baseline', help='비교할 기준 결과 JSON. 느려진 단계가 있으면 종료 코드 1')
+    parser.add_argument('--threshold', type=float, default=0.25, help='허용하는 느려짐 비율')
+    parser.add_argument('--imports', default=','.join(IMPORT_MODULES),
+                        help="시작 시간(-X importtime)을 잴 쉼표로 구분한 모듈 ('none'은 측정 안 함)")
+    args = parser.parse_args()
+
+    if args.tickers == 'all':
+        tickers = sorted({ticker for ticker, _ in list_keys()})
+    else:
+        tickers = args.tickers.split(',') if args.tickers else None
+    report = run_benchmarks(
+        tickers=tickers,
+        intervals=args.intervals.split(',') if args.intervals else None,
+        stages=args.stages.split(',') if args.stages else None,
+        repeat=args.repeat,
+    )
+    if args.imports != 'none':
+        report['import_time'] = {module: import_time(module, args.repeat) for module in args.imports.split(',')}
+    print_report(report)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        for name, interval, before, after, ratio in regressions:
+            print(f"REGRESSION {name} ({interval}): {before * 1000:.1f}ms -> {after * 1000:.1f}ms ({ratio:.2f}x)")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+from chart_lod import downsample_ohlcv, minmax_decimate, MAX_CHART_POINTS
+
+
+def ma_styles(ema_period, ma_long_period, ma_mid_periods):
+    """이동평균선별 (색상, 선 굵기). EMA와 장기 MA는 굵게 표시"""
+    colors = {
+        f'EMA{ema_period}': 'blue',
+        f'MA{ma_long_period}': 'red',
+        f'MA{ma_mid_periods[0]}': 'green',
+        f'MA{ma_mid_periods[1]}': 'orange',
+        f'MA{ma_mid_periods[2]}': 'purple'
+    }
+    bold = (f'EMA{ema_period}', f'MA{ma_long_period}')
+    return {name: (color, 3 if name in bold else 1) for name, color in colors.items()}
+
+
+# 거래량 막대 색상: 0=상승(초록), 1=하락(빨강)
+VOLUME_COLORSCALE = [[0, 'green'], [1, 'red']]
+
+
+def volume_colors(candles):
+    """하락 봉은 1, 나머지는 0 (배열 연산)
+
+    색상 문자열 배열 대신 숫자 배열과 VOLUME_COLORSCALE을 쓰면 Plotly가 값마다 검증하지 않는다.
+    """
+    return (candles['close'].to_numpy() < candles['open'].to_numpy()).astype(np.int8)
+
+
+def chart_x(index):
+    """차트 x축 값: 시간대가 있는 인덱스는 거래소 현지 시각의 datetime64 배열로 변환
+
+    Timestamp 객체 배열을 넘기면 Plotly가 값마다 복사/직렬화하므로 느리다.
+    """
+    if isinstance(index, pd.DatetimeIndex):
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        return index.to_numpy()
+    return np.asarray(index)
+
+
+def format_signal_dates(index, date_format='%Y-%m-%d'):
+    """시그널 인덱스를 날짜 문자열 목록으로 변환 (변환할 수 없는 값은 문자열 그대로)"""
+    index = pd.Index(index)
+    if isinstance(index, pd.DatetimeIndex):
+        return list(index.strftime(date_format))
+    dates = pd.to_datetime(index, errors='coerce', utc=True)
+    formatted = pd.Series(dates.strftime(date_format), dtype=object)
+    fallback = pd.Series(index.astype(str), dtype=object)
+    return formatted.where(dates.notna(), fallback).tolist()
+
+
+def build_analysis_figure(ohlcv, signals, indicators, ema_period, ma_long_period, ma_mid_periods,
+                          name=None, max_points=MAX_CHART_POINTS):
+    """캔들스틱/이동평균선/시그널/거래량 차트 생성
+
+    ohlcv는 가격 데이터, indicators는 analyze_strategy가 계산한 이동평균선 컬럼을 가진 데이터
+    (같은 프레임을 넘겨도 된다). 봉 수가 max_points보다 많으면 차트용으로 줄여서 보낸다.
+    """
+    # Plotly는 차트를 만들 때 처음 불러온다 (앱 시작 시간 단축)
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    signals = np.asarray(signals, dtype=bool)
+    candles = downsample_ohlcv(ohlcv, max_points, keep=signals)
+
+    candle_x = chart_x(candles.index)
+    traces = [go.Candlestick(
+        x=candle_x,
+        open=candles['open'],
+        high=candles['high'],
+        low=candles['low'],
+        close=candles['close'],
+        name=name
+    )]
+
+    # 이동평균선
+    for ma_name, (color, line_width) in ma_styles(ema_period, ma_long_period, ma_mid_periods).items():
+        values = indicators[ma_name].to_numpy()
+        points = minmax_decimate(values, max_points)
+        traces.append(go.Scatter(
+            x=chart_x(indicators.index[points]),
+            y=values[points],
+            name=ma_name,
+            line=dict(color=color, width=line_width),
+            opacity=0.7
+        ))
+
+    # 시그널 포인트
+    traces.append(go.Scatter(
+        x=chart_x(ohlcv.index[signals]),
+        y=ohlcv['close'].to_numpy()[signals] + 10,
+        mode='markers',
+        name='Signal',
+        marker=dict(
+            symbol='triangle-down',
+            size=10,
+            color='red'
+        )
+    ))
+
+    # 거래량
+    traces.append(go.Bar(
+        x=candle_x,
+        y=candles['volume'],
+        name='Volume',
+        marker=dict(color=volume_colors(candles), colorscale=VOLUME_COLORSCALE, cmin=0, cmax=1),
+        opacity=0.5
+    ))
+
+    fig = make_subplots(rows=2, cols=1,
+                        shared_xaxes=True,
+                        vertical_spacing=0.03,
+                        row_heights=[0.7, 0.3])
+    fig.add_traces(traces, rows=[1] * (len(traces) - 1) + [2], cols=[1] * len(traces))
+
+    # 차트 레이아웃 설정
+    fig.update_layout(
+        title='Trading Strategy Analysis',
+        yaxis_title='Price',
+        yaxis2_title='Volume',
+        xaxis_rangeslider_visible=False,
+        height=800,
+        showlegend=True,
+        legend=dict(
+            yanchor="top",
+            y=0.99,
+            xanchor="left",
+            x=0.01
+        )
+    )
+
+    # 차트 스타일 설정
+    fig.update_xaxes(gridcolor='lightgrey', gridwidth=0.5)
+    fig.update_yaxes(gridcolor='lightgrey', gridwidth=0.5)
+    return fig
+
+
+def benchmark_render_prep(ticker='NVDA', intervals=None, params=None):
+    """캔들 주기별 차트 준비 시간(그림 생성 + JSON 직렬화)과 전송 크기 측정"""
+    from data_store import load_ohlcv
+    from strategy_analysis import analyze_strategy
+
+    intervals = intervals or ["1m", "2m", "5m", "15m", "30m", "60m", "90m", "1h",
+                              "1d", "5d", "1wk", "1mo", "3mo"]
+    params = params or dict(tolerance=1e-6, compression_period=20, compression_threshold=0.05,
+                            ema_period=120, ma_long_period=111, ma_mid_periods=(25, 33, 49))
+    results = []
+    warmed_up = False
+    for interval in intervals:
+        try:
+            ohlcv = load_ohlcv(ticker, interval, compact=True)
+        except FileNotFoundError:
+            continue
+        indicators, signals = analyze_strategy(ohlcv, **params)
+        if not warmed_up:
+            # Plotly 검증기/직렬화 초기화 비용은 측정에서 제외
+            build_analysis_figure(ohlcv, signals, indicators, params['ema_period'],
+                                  params['ma_long_period'], params['ma_mid_periods']).to_json()
+            warmed_up = True
+
+        start = time.perf_counter()
+        fig = build_analysis_figure(ohlcv, signals, indicators, params['ema_period'],
+                                    params['ma_long_period'], params['ma_mid_periods'], name=ticker)
+        dates = format_signal_dates(ohlcv.index[signals.to_numpy()])
+        payload = fig.to_json()
+        elapsed = time.perf_counter() - start
+        results.append({'interval': interval, 'bars': len(ohlcv), 'signals': len(dates),
+                        'seconds': elapsed, 'payload_bytes': len(payload)})
+    return results
+
+
+def main():
+    ticker = sys.argv[1] if len(sys.argv) > 1 else 'NVDA'
+    print(f"{'interval':>8} {'bars':>7} {'prep (ms)':>10} {'payload (KB)':>13}")
+    for row in benchmark_render_prep(ticker):
+        print(f"{row['interval']:>8} {row['bars']:>7} {row['seconds'] * 1000:>10.1f} {row['payload_bytes'] / 1024:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
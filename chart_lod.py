@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+
+# 차트 trace 하나에 보내는 최대 점 수
+MAX_CHART_POINTS = 1500
+
+
+def bucket_ids(length, max_buckets, keep=None):
+    """봉 위치별 묶음 번호 계산
+
+    length개 봉을 약 max_buckets개 묶음으로 나누되, keep이 True인 봉(시그널 봉)은
+    항상 단독 묶음이 되도록 앞뒤에서 묶음을 끊는다.
+    """
+    size = max(1, int(np.ceil(length / max_buckets)))
+    positions = np.arange(length)
+    boundary = positions % size == 0
+    if keep is not None:
+        keep = np.asarray(keep, dtype=bool)
+        boundary |= keep
+        boundary[1:] |= keep[:-1]
+    return np.cumsum(boundary) - 1
+
+
+def downsample_ohlcv(ohlcv, max_bars=MAX_CHART_POINTS, keep=None):
+    """OHLCV를 최대 약 max_bars개 봉으로 재집계 (시가=첫 값, 고가=최대, 저가=최소, 종가=마지막, 거래량=합)
+
+    각 묶음의 인덱스는 첫 봉의 시각이며, keep에 해당하는 봉은 원래 봉 그대로 남는다.
+    """
+    if len(ohlcv) <= max_bars:
+        return ohlcv
+    groups = bucket_ids(len(ohlcv), max_bars, keep)
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+    ends = np.r_[starts[1:], len(ohlcv)] - 1
+
+    aggregated = {
+        'open': ohlcv['open'].to_numpy()[starts],
+        'high': np.maximum.reduceat(ohlcv['high'].to_numpy(), starts),
+        'low': np.minimum.reduceat(ohlcv['low'].to_numpy(), starts),
+        'close': ohlcv['close'].to_numpy()[ends],
+    }
+    if 'volume' in ohlcv:
+        aggregated['volume'] = np.add.reduceat(ohlcv['volume'].to_numpy(), starts)
+    return pd.DataFrame(aggregated, index=ohlcv.index[starts])
+
+
+def minmax_decimate(values, max_points=MAX_CHART_POINTS):
+    """선 그래프용 최소/최대 솎아내기
+
+    값을 max_points/2개 구간으로 나눠 각 구간의 최솟값과 최댓값 위치만 남긴다.
+    모양(봉우리/골짜기)을 유지하면서 점 수를 제한한다. 반환값은 남길 위치 배열.
+    """
+    values = np.asarray(values, dtype=float)
+    length = len(values)
+    if length <= max_points:
+        return np.arange(length)
+
+    buckets = max(1, max_points // 2)
+    size = int(np.ceil(length / buckets))
+    padded = np.full(buckets * size, np.nan)
+    padded[:length] = values
+    rows = padded.reshape(buckets, size)
+
+    valid = ~np.isnan(rows)
+    has_value = valid.any(axis=1)
+    offsets = np.arange(buckets) * size
+    lows = np.where(valid, rows, np.inf).argmin(axis=1) + offsets
+    highs = np.where(valid, rows, -np.inf).argmax(axis=1) + offsets
+    return np.unique(np.concatenate([lows[has_value], highs[has_value]]))
+
+
+def visible_slice(ohlcv, signals, indicators, start=None, end=None):
+    """화면에 표시할 구간만 잘라내기 (확대하면 해당 구간을 원래 해상도로 다시 가져온다)
+
+    같은 인덱스의 ohlcv/시그널/지표를 함께 잘라 반환한다.
+    start/end는 거래소 현지 시각(시간대 정보 없음)으로 비교한다.
+    """
+    index = ohlcv.index
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    mask = np.ones(len(ohlcv), dtype=bool)
+    if start is not None:
+        mask &= index >= start
+    if end is not None:
+        mask &= index <= end
+    return ohlcv[mask], signals[mask], indicators[mask]
@@ -1,12 +1,15 @@
-import yfinance as yf
 import pandas as pd
-from datetime import datetime, timedelta
-import os
+from datetime import timedelta
+import time
+import argparse
+from data_store import append_ohlcv, last_bar_time, mark_updated, MARKET_TZ
+from downloader import download_all, FixtureBackend, YFinanceBackend
+from signal_index import build_signal_index, save_signal_index, load_presets
+from resample import BASE_INTERVALS, update_derived
+from pattern_search import PatternIndex
 
 def get_valid_date_range(interval):
     """선택된 캔들 주기에 따른 유효한 날짜 범위 반환"""
-    today = datetime(2025, 2, 19, 13, 20, 37, 106915)
-    
     intervals = {
         "1m": {"days": 7, "default": 7-1},
         "2m": {"days": 60, "default": 60-1},
@@ -25,22 +28,37 @@ def get_valid_date_range(interval):
     
     return intervals
 
+def get_fetch_start(ticker, interval, today):
+    """증분 수집 시작 시각 계산
+
+    저장된 데이터가 없으면 캔들 주기별 기본 기간 전체, 있으면 마지막 봉부터
+    (수집 당시 진행 중이던 봉 갱신) yfinance 조회 가능 기간 내에서 다시 받는다.
+    """
+    intervals = get_valid_date_range(interval)
+    last_bar = last_bar_time(ticker, interval)
+    if last_bar is None:
+        return today - timedelta(days=intervals[interval]["default"])
+    return max(last_bar, today - timedelta(days=intervals[interval]["days"] - 1))
+
 def collect_stock_data(ticker, interval="1d"):
-    """특정 티커의 데이터를 수집하고 저장"""
+    """특정 티커의 데이터를 증분 수집하고 저장
+
+    저장된 마지막 봉 이후의 데이터만 받아 기존 데이터에 이어 붙인다.
+    """
     intervals = get_valid_date_range(interval)
-    today = datetime(2025, 2, 19, 13, 20, 37, 106915)
+    today = pd.Timestamp.now(tz=MARKET_TZ)
     
     if interval not in intervals:
         print(f"Invalid interval: {interval}")
         return
     
     # 날짜 범위 계산
-    default_days = intervals[interval]["default"]
-    start_date = today - timedelta(days=default_days)
+    start_date = get_fetch_start(ticker, interval, today)
     
     try:
         # 데이터 수집
-        print(f"Collecting data for {ticker} ({interval})...")
+        print(f"Collecting data for {ticker} ({interval}) from {start_date:%Y-%m-%d %H:%M}...")
+        import yfinance as yf
         stock = yf.Ticker(ticker)
         data = stock.history(
             start=start_date,
@@ -49,17 +67,13 @@ def collect_stock_data(ticker, interval="1d"):
         )
         
         if len(data) == 0:
-            print(f"No data available for {ticker}")
+            print(f"No new data for {ticker}")
             return
         
-        # 저장 경로 생성
-        if not os.path.exists('data'):
-            os.makedirs('data')
-        
-        # 파일명 생성 및 저장
-        filename = f'data/{ticker}_{interval}_{start_date.strftime("%Y%m%d")}_{today.strftime("%Y%m%d")}.csv'
-        data.to_csv(filename)
-        print(f"Data saved to {filename}")
+        # (티커, 캔들 주기)별 Parquet 저장소에 이어서 저장
+        filename, added = append_ohlcv(data, ticker, interval)
+        mark_updated()
+        print(f"{added} new bars saved to {filename}")
         
         return data
     
@@ -155,25 +169,66 @@ def main():
         "1d", "5d", "1wk", "1mo", "3mo"
     ]
     
+    parser = argparse.ArgumentParser(description='주식 데이터 증분 수집')
+    parser.add_argument('--fixture-dir', help='yfinance 대신 사용할 로컬 데이터 폴더 (오프라인 테스트용)')
+    parser.add_argument('--workers', type=int, default=4, help='동시 다운로드 수')
+    parser.add_argument('--batch-size', type=int, default=10, help='한 번에 요청할 티커 수')
+    parser.add_argument('--skip-index', action='store_true', help='수집 후 시그널/유사 차트 인덱스를 만들지 않음')
+    parser.add_argument('--all-intervals', action='store_true',
+                        help='파생 캔들 주기(15m, 30m, 60m, 90m, 5d, 1wk, 1mo, 3mo)도 직접 다운로드')
+    parser.add_argument('--presets', help='시그널 인덱스에 미리 계산할 프리셋 JSON 파일')
+    args = parser.parse_args()
+    backend = FixtureBackend(args.fixture_dir) if args.fixture_dir else YFinanceBackend()
+    # 기본은 기준 캔들 주기만 받고 나머지는 재집계로 만든다
+    if not args.all_intervals:
+        intervals = BASE_INTERVALS
+
+    # (티커, 캔들 주기)별 증분 수집 구간 계산
+    today = pd.Timestamp.now(tz=MARKET_TZ)
+    tasks = [(ticker, interval, get_fetch_start(ticker, interval, today), today)
+             for interval in intervals for ticker in tickers.keys()]
+
     # 진행 상황 표시를 위한 총 작업 수 계산
-    total_tasks = len(tickers) * len(intervals)
+    total_tasks = len(tasks)
     completed_tasks = 0
-    
-    # 각 티커와 간격에 대해 데이터 수집
-    for interval in intervals:
-        print(f"\nCollecting {interval} data...")
-        for ticker in tickers.keys():
-            completed_tasks += 1
-            print(f"Progress: {completed_tasks}/{total_tasks} ({(completed_tasks/total_tasks)*100:.1f}%)")
-            
-            collect_stock_data(ticker, interval)
-            # API 제한을 위한 대기
-            import time
-            time.sleep(1)  # 1초 대기
-            
-            # 분봉 데이터의 경우 더 긴 대기 시간 적용
-            if interval in ["1m", "2m", "5m", "15m", "30m"]:
-                time.sleep(2)  # 추가 2초 대기
+
+    def save_result(ticker, interval, data):
+        nonlocal completed_tasks
+        completed_tasks += 1
+        filename, added = append_ohlcv(data, ticker, interval)
+        print(f"Progress: {completed_tasks}/{total_tasks} ({(completed_tasks/total_tasks)*100:.1f}%) "
+              f"{ticker} ({interval}): {added} new bars saved to {filename}")
+
+    # 캔들 주기별 속도 제한 안에서 병렬로 다운로드
+    start = time.perf_counter()
+    status = download_all(tasks, backend, on_result=save_result,
+                          max_workers=args.workers, batch_size=args.batch_size)
+    failed = {key: message for key, message in status.items() if message not in ('ok', 'empty')}
+    for (ticker, interval), message in failed.items():
+        print(f"Error collecting data for {ticker} ({interval}): {message}")
+
+    # 기준 데이터로 파생 캔들 주기 갱신
+    if not args.all_intervals:
+        for ticker in tickers:
+            added = update_derived(ticker)
+            print(f"{ticker}: derived " + ", ".join(f"{interval} +{count}" for interval, count in added.items()))
+    # 실행 중인 앱이 공유 캐시를 비우도록 갱신 표시
+    mark_updated()
+    print(f"\nDone in {time.perf_counter() - start:.1f}s ({len(failed)} failed)")
+
+    # 앱이 시작할 때 바로 쓰는 프리셋별 시그널 인덱스 갱신
+    if not args.skip_index:
+        start = time.perf_counter()
+        presets = load_presets(args.presets) if args.presets else None
+        table, versions = build_signal_index(presets)
+        path = save_signal_index(table, versions, presets)
+        print(f"Signal index: {len(table)} signals saved to {path} ({time.perf_counter() - start:.1f}s)")
+
+        # 유사 차트 검색 인덱스 갱신
+        start = time.perf_counter()
+        pattern_index = PatternIndex.build()
+        path = pattern_index.save()
+        print(f"Pattern index: {len(pattern_index.values)} bars saved to {path} ({time.perf_counter() - start:.1f}s)")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
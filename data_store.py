@@ -0,0 +1,254 @@
+import os
+import glob
+import time
+import argparse
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+DATA_DIR = 'data'
+STORE_DIR = os.path.join(DATA_DIR, 'store')
+MARKET_TZ = 'America/New_York'
+INDEX_NAME = 'datetime'
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+PRICE_COLUMNS = ['open', 'high', 'low', 'close']
+# 수집이 끝날 때마다 갱신하는 표시 파일 (앱의 공유 캐시가 이 파일이 바뀌면 비워진다)
+UPDATE_MARKER = 'last_update'
+
+
+def store_path(ticker, interval, store_dir=STORE_DIR):
+    """(티커, 캔들 주기)에 해당하는 Parquet 파일 경로 반환"""
+    return os.path.join(store_dir, interval, f'{ticker}.parquet')
+
+
+def find_csv_files(ticker, interval, data_dir=DATA_DIR):
+    """data_collector가 저장한 (티커, 캔들 주기)의 CSV 파일 목록 반환 (오래된 순)"""
+    return sorted(glob.glob(os.path.join(data_dir, f'{ticker}_{interval}_*.csv')))
+
+
+def list_csv_keys(data_dir=DATA_DIR):
+    """data 폴더의 CSV 파일들로부터 (티커, 캔들 주기) 목록 반환"""
+    keys = set()
+    for path in glob.glob(os.path.join(data_dir, '*.csv')):
+        parts = os.path.basename(path)[:-len('.csv')].split('_')
+        if len(parts) == 4:
+            keys.add((parts[0], parts[1]))
+    return sorted(keys)
+
+
+def list_keys(store_dir=STORE_DIR, data_dir=DATA_DIR):
+    """저장소와 CSV 파일에 있는 모든 (티커, 캔들 주기) 목록 반환"""
+    keys = set(list_csv_keys(data_dir))
+    for path in glob.glob(os.path.join(store_dir, '*', '*.parquet')):
+        interval = os.path.basename(os.path.dirname(path))
+        keys.add((os.path.basename(path)[:-len('.parquet')], interval))
+    return sorted(keys)
+
+
+def normalize_ohlcv(data):
+    """yfinance/CSV 데이터를 저장 형식으로 정리
+
+    컬럼명을 소문자로 바꾸고, 서로 다른 UTC 오프셋이 섞인 인덱스를
+    거래소 시간대(America/New_York)의 DatetimeIndex로 통일한다.
+    시간대 없는 DatetimeIndex(yfinance 일봉 이상의 기본값)는 거래소 시각으로 본다.
+    """
+    data = data.copy()
+    data.columns = data.columns.str.lower()
+    index = data.index
+    if isinstance(index, pd.DatetimeIndex) and index.tz is None:
+        index = index.tz_localize(MARKET_TZ)
+    data.index = pd.to_datetime(index, utc=True).tz_convert(MARKET_TZ)
+    data.index.name = INDEX_NAME
+    data = data[~data.index.duplicated(keep='last')]
+    return data.sort_index()
+
+
+def compact_ohlcv(data):
+    """전략/차트에 필요한 컬럼만 남긴 메모리 절약형 OHLCV
+
+    가격은 float32, 거래량은 int64로 저장한다. 인덱스는 int64 나노초 값을 담는 DatetimeIndex 그대로 둔다.
+    가격 컬럼은 float64 대비 절반 크기이며, 번들 데이터에서는 눌림목 허용 범위가 0인 경우(가격이 정확히
+    같은 봉)를 제외하면 시그널 결과가 float64와 같다.
+    """
+    columns = {name: data[name].to_numpy(dtype=np.float32) for name in PRICE_COLUMNS}
+    columns['volume'] = data['volume'].fillna(0).to_numpy(dtype=np.int64)
+    return pd.DataFrame(columns, index=data.index)
+
+
+def read_csv(path):
+    """data_collector가 저장한 CSV 파일을 읽어 저장 형식으로 반환"""
+    return normalize_ohlcv(pd.read_csv(path, index_col=0))
+
+
+def save_ohlcv(data, ticker, interval, store_dir=STORE_DIR):
+    """데이터를 Parquet 파일로 저장 (임시 파일에 쓴 뒤 교체하므로 원자적)"""
+    path = store_path(ticker, interval, store_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    data = normalize_ohlcv(data)
+    # 가격 컬럼은 byte stream split, 거래량/배당 등 반복값이 많은 컬럼은 사전 인코딩
+    price_columns = [c for c in ['open', 'high', 'low', 'close'] if c in data.columns]
+    other_columns = [c for c in data.columns if c not in price_columns]
+    data.to_parquet(tmp_path, engine='pyarrow', compression='zstd', compression_level=9,
+                    use_byte_stream_split=price_columns, use_dictionary=other_columns)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _to_market_time(value):
+    value = pd.Timestamp(value)
+    if value.tzinfo is None:
+        return value.tz_localize(MARKET_TZ)
+    return value.tz_convert(MARKET_TZ)
+
+
+def load_ohlcv(ticker, interval, columns=None, start=None, end=None,
+               store_dir=STORE_DIR, data_dir=DATA_DIR, compact=False):
+    """(티커, 캔들 주기)의 데이터를 불러오기
+
+    columns로 필요한 컬럼만, start 이상 end 미만 구간만 읽는다.
+    Parquet 저장소에 없으면 data 폴더의 CSV 파일로 대체한다.
+    compact=True이면 OHLCV 컬럼만 compact_ohlcv 형식으로 반환한다.
+    """
+    if compact:
+        return compact_ohlcv(load_ohlcv(ticker, interval, OHLCV_COLUMNS, start, end, store_dir, data_dir))
+
+    start = _to_market_time(start) if start is not None else None
+    end = _to_market_time(end) if end is not None else None
+
+    path = store_path(ticker, interval, store_dir)
+    if os.path.exists(path):
+        filters = []
+        if start is not None:
+            filters.append((INDEX_NAME, '>=', start))
+        if end is not None:
+            filters.append((INDEX_NAME, '<', end))
+        read_columns = None if columns is None else [INDEX_NAME] + list(columns)
+        table = pq.read_table(path, columns=read_columns, filters=filters or None)
+        return table.to_pandas()
+
+    csv_files = find_csv_files(ticker, interval, data_dir)
+    if csv_files:
+        data = pd.concat([read_csv(f) for f in csv_files])
+        data = data[~data.index.duplicated(keep='last')].sort_index()
+    else:
+        # 직접 받은 데이터가 없으면 기준 캔들 주기에서 만든다 (resample이 data_store를 사용하므로 여기서 import)
+        from resample import DERIVED_INTERVALS, load_derived
+        if interval not in DERIVED_INTERVALS:
+            raise FileNotFoundError(f'No data for {ticker} ({interval})')
+        data = load_derived(ticker, interval, store_dir, data_dir)
+    if start is not None:
+        data = data[data.index >= start]
+    if end is not None:
+        data = data[data.index < end]
+    if columns is not None:
+        data = data[list(columns)]
+    return data
+
+
+def last_bar_time(ticker, interval, store_dir=STORE_DIR, data_dir=DATA_DIR):
+    """저장된 마지막 봉의 시각 (데이터가 없으면 None). 인덱스 컬럼만 읽는다"""
+    try:
+        index = load_ohlcv(ticker, interval, columns=[], store_dir=store_dir, data_dir=data_dir).index
+    except FileNotFoundError:
+        return None
+    return index.max() if len(index) else None
+
+
+def append_ohlcv(data, ticker, interval, store_dir=STORE_DIR, data_dir=DATA_DIR):
+    """새 데이터를 기존 데이터 뒤에 이어 붙여 저장
+
+    겹치는 봉은 새 데이터로 교체한다 (수집 시점에 진행 중이던 마지막 봉 갱신).
+    저장은 save_ohlcv와 같이 원자적으로 이루어지며, (파일 경로, 추가된 봉 수)를 반환한다.
+    """
+    data = normalize_ohlcv(data)
+    try:
+        existing = load_ohlcv(ticker, interval, store_dir=store_dir, data_dir=data_dir)
+    except FileNotFoundError:
+        existing = data.iloc[:0]
+
+    combined = pd.concat([existing, data])
+    combined = combined[~combined.index.duplicated(keep='last')].sort_index()
+    path = save_ohlcv(combined, ticker, interval, store_dir)
+    return path, len(combined) - len(existing)
+
+
+def data_version(ticker, interval, store_dir=STORE_DIR, data_dir=DATA_DIR):
+    """데이터 파일의 수정 시각(ns). 데이터가 바뀌면 값이 바뀐다"""
+    path = store_path(ticker, interval, store_dir)
+    if os.path.exists(path):
+        return os.stat(path).st_mtime_ns
+    csv_files = find_csv_files(ticker, interval, data_dir)
+    if not csv_files:
+        # 파생 캔들 주기는 기준 데이터의 버전을 따른다
+        from resample import DERIVED_INTERVALS
+        if interval in DERIVED_INTERVALS:
+            return data_version(ticker, DERIVED_INTERVALS[interval][0], store_dir, data_dir)
+        return None
+    return max(os.stat(f).st_mtime_ns for f in csv_files)
+
+
+def mark_updated(store_dir=STORE_DIR):
+    """저장소 갱신 완료 시각을 표시 파일에 기록"""
+    os.makedirs(store_dir, exist_ok=True)
+    path = os.path.join(store_dir, UPDATE_MARKER)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(pd.Timestamp.now(tz=MARKET_TZ).isoformat())
+    os.replace(tmp_path, path)
+
+
+def last_update(store_dir=STORE_DIR):
+    """마지막 저장소 갱신 표시 시각(ns). 표시 파일이 없으면 None"""
+    path = os.path.join(store_dir, UPDATE_MARKER)
+    if not os.path.exists(path):
+        return None
+    return os.stat(path).st_mtime_ns
+
+
+def migrate_csv_to_store(data_dir=DATA_DIR, store_dir=STORE_DIR):
+    """data 폴더의 CSV 파일들을 Parquet 저장소로 한 번에 변환하고 벤치마크 결과 반환"""
+    keys = list_csv_keys(data_dir)
+    report = {'files': 0, 'csv_bytes': 0, 'store_bytes': 0, 'csv_load_seconds': 0.0, 'store_load_seconds': 0.0}
+
+    for i, (ticker, interval) in enumerate(keys):
+        csv_files = find_csv_files(ticker, interval, data_dir)
+        data = pd.concat([read_csv(f) for f in csv_files])
+        path = save_ohlcv(data, ticker, interval, store_dir)
+
+        # 기존 방식(app.main의 read_csv)과 저장소 로딩 시간 비교
+        start = time.perf_counter()
+        for f in csv_files:
+            pd.read_csv(f, index_col=0, parse_dates=True)
+        report['csv_load_seconds'] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        load_ohlcv(ticker, interval, columns=OHLCV_COLUMNS, store_dir=store_dir, data_dir=data_dir)
+        report['store_load_seconds'] += time.perf_counter() - start
+
+        report['files'] += len(csv_files)
+        report['csv_bytes'] += sum(os.path.getsize(f) for f in csv_files)
+        report['store_bytes'] += os.path.getsize(path)
+        print(f"Progress: {i + 1}/{len(keys)} ({ticker} {interval})")
+
+    mark_updated(store_dir)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CSV 데이터를 Parquet 저장소로 변환')
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--store-dir', default=STORE_DIR)
+    args = parser.parse_args()
+
+    report = migrate_csv_to_store(args.data_dir, args.store_dir)
+
+    print(f"\n변환한 CSV 파일: {report['files']}개")
+    print(f"디스크 사용량: {report['csv_bytes'] / 1e6:.1f} MB -> {report['store_bytes'] / 1e6:.1f} MB "
+          f"({report['csv_bytes'] / max(report['store_bytes'], 1):.1f}배 감소)")
+    print(f"전체 로딩 시간: {report['csv_load_seconds']:.2f}s -> {report['store_load_seconds']:.2f}s "
+          f"({report['csv_load_seconds'] / max(report['store_load_seconds'], 1e-9):.1f}배 감소)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+from data_store import load_ohlcv, DATA_DIR
+
+# 캔들 주기 분류별 요청 속도 제한 (초당 요청 수, 최대 연속 요청 수)
+RATE_LIMITS = {
+    'intraday': (0.5, 2),
+    'hourly': (1.0, 4),
+    'daily': (2.0, 5),
+}
+
+INTRADAY_INTERVALS = ["1m", "2m", "5m", "15m", "30m"]
+HOURLY_INTERVALS = ["60m", "90m", "1h"]
+
+
+def interval_class(interval):
+    """캔들 주기를 속도 제한 분류로 변환"""
+    if interval in INTRADAY_INTERVALS:
+        return 'intraday'
+    if interval in HOURLY_INTERVALS:
+        return 'hourly'
+    return 'daily'
+
+
+class TokenBucket:
+    """토큰 버킷 방식의 요청 속도 제한 (스레드 안전)"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """토큰이 충분해질 때까지 기다린 뒤 가져가기"""
+        # 한 번에 capacity보다 많이 요청하면 나눠서 가져간다
+        while tokens > 0:
+            take = min(tokens, self.capacity)
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= take:
+                    self._tokens -= take
+                    tokens -= take
+                    continue
+                wait = (take - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class YFinanceBackend:
+    """yfinance 데이터 소스. 여러 티커를 yf.download 한 번으로 요청한다"""
+
+    supports_batch = True
+
+    def fetch(self, tickers, interval, start, end):
+        import yfinance as yf
+
+        # 일봉 이상은 ignore_tz 기본값(True)이면 시간대 없는 인덱스가 와서 저장된 봉과 시각이 어긋난다
+        data = yf.download(list(tickers), start=start, end=end, interval=interval,
+                           group_by='ticker', auto_adjust=True, actions=True,
+                           ignore_tz=False, threads=False, progress=False)
+        results = {}
+        for ticker in tickers:
+            if ticker not in data.columns.get_level_values(0):
+                continue
+            frame = data[ticker].dropna(how='all')
+            if len(frame):
+                results[ticker] = frame
+        return results
+
+
+class FixtureBackend:
+    """로컬 데이터(CSV 폴더 또는 Parquet 저장소)를 데이터 소스로 사용하는 오프라인 백엔드
+
+    naive_daily=True이면 yfinance(ignore_tz=True)처럼 일봉 이상 데이터를 시간대 없는 거래소 시각 인덱스로 돌려준다.
+    """
+
+    supports_batch = True
+
+    def __init__(self, data_dir=DATA_DIR, delay=0.0, naive_daily=False):
+        self.data_dir = data_dir
+        self.store_dir = os.path.join(data_dir, 'store')
+        self.delay = delay
+        self.naive_daily = naive_daily
+
+    def fetch(self, tickers, interval, start, end):
+        if self.delay:
+            time.sleep(self.delay)
+        results = {}
+        for ticker in tickers:
+            try:
+                frame = load_ohlcv(ticker, interval, start=start, end=end,
+                                   store_dir=self.store_dir, data_dir=self.data_dir)
+            except FileNotFoundError:
+                continue
+            if self.naive_daily and interval_class(interval) == 'daily':
+                frame.index = frame.index.tz_localize(None)
+            if len(frame):
+                results[ticker] = frame
+        return results
+
+
+def _batches(tasks, batch_size):
+    """캔들 주기와 시작 시각이 같은 작업을 batch_size개씩 묶기
+
+    새 티커(전체 기간)와 최신 티커(마지막 봉부터)가 한 묶음에 섞이면 최신 티커도 전체 기간을 다시 받게 되므로
+    시작 시각별로 나눈다. 끝 시각은 묶음에서 가장 늦은 값을 쓴다.
+    """
+    groups = {}
+    for ticker, interval, start, end in tasks:
+        groups.setdefault((interval, pd.Timestamp(start)), []).append((ticker, end))
+    for (interval, start), items in groups.items():
+        for i in range(0, len(items), batch_size):
+            batch = items[i:i + batch_size]
+            yield ([ticker for ticker, _ in batch], interval, start,
+                   max(pd.Timestamp(end) for _, end in batch))
+
+
+def _fetch_with_retry(backend, bucket, tickers, interval, start, end, retries, backoff):
+    for attempt in range(retries + 1):
+        # 실제 요청은 티커 수만큼 발생하므로 그만큼 토큰을 사용
+        bucket.acquire(len(tickers))
+        try:
+            return backend.fetch(tickers, interval, start, end)
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(backoff * (2 ** attempt))
+
+
+def download_all(tasks, backend=None, on_result=None, max_workers=4, batch_size=10,
+                 retries=3, backoff=1.0, rate_limits=RATE_LIMITS):
+    """(티커, 캔들 주기, 시작, 끝) 작업 목록을 병렬로 다운로드
+
+    요청 속도는 캔들 주기 분류별 토큰 버킷으로 제한하고, 실패한 요청은 지수 백오프로 재시도한다.
+    on_result(ticker, interval, data)는 결과가 도착하는 대로 호출되며 (호출 스레드에서 순차 실행),
+    반환값은 {(ticker, interval): 'ok' | 'empty' | 오류 메시지}.
+    """
+    backend = backend or YFinanceBackend()
+    buckets = {name: TokenBucket(rate, capacity) for name, (rate, capacity) in rate_limits.items()}
+    size = batch_size if backend.supports_batch else 1
+    status = {(ticker, interval): 'empty' for ticker, interval, _, _ in tasks}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(_fetch_with_retry, backend, buckets[interval_class(interval)],
+                            tickers, interval, start, end, retries, backoff): (tickers, interval)
+            for tickers, interval, start, end in _batches(tasks, size)
+        }
+        for future in as_completed(futures):
+            tickers, interval = futures[future]
+            try:
+                results = future.result()
+            except Exception as e:
+                for ticker in tickers:
+                    status[(ticker, interval)] = str(e)
+                continue
+            for ticker, data in results.items():
+                status[(ticker, interval)] = 'ok'
+                if on_result is not None:
+                    on_result(ticker, interval, data)
+    return status
@@ -0,0 +1,214 @@
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from data_store import load_ohlcv, list_keys
+
+# EMA 블록 계산에서 감쇠 계수 거듭제곱의 역수가 넘지 않게 할 크기와 블록 길이 상한
+_BLOCK_GROWTH = 1e100
+_MAX_BLOCK = 1 << 14
+
+
+def _as_rows(values):
+    """(봉,) 또는 (티커 x 봉) 배열을 float64 (티커 x 봉) 배열로"""
+    return np.atleast_2d(np.asarray(values, dtype=np.float64))
+
+
+def _first_valid(values):
+    """행별 첫 실제 값 위치 (앞쪽 NaN은 batch_strategy 오른쪽 정렬의 빈 칸, 값이 없으면 봉 수)"""
+    valid = ~np.isnan(values)
+    return np.where(valid.any(axis=1), valid.argmax(axis=1), values.shape[1])
+
+
+def _has_gaps(values, starts):
+    """첫 실제 값 이후에 NaN이 있는 행 (pandas로 계산해야 ta와 같은 값이 나온다)"""
+    positions = np.arange(values.shape[1])
+    return (np.isnan(values) & (positions >= starts[:, None])).any(axis=1)
+
+
+def _pandas_rows(values, rows, method):
+    """일부 행을 ta와 같은 pandas 연산으로 계산"""
+    return method(pd.DataFrame(values[rows].T)).to_numpy().T
+
+
+def ema(values, period):
+    """ta.trend.ema_indicator와 같은 EMA (ewm(span=period, adjust=False, min_periods=period))
+
+    재귀식 y[t] = (1 - a) * y[t-1] + a * x[t]를 봉마다 반복하지 않고, 블록 단위로
+    y[b+k] = r^k * (r * y[b-1] + cumsum(u[b+j] * r^-j))로 한 번에 계산한다 (r = 1 - a).
+    반올림 순서가 달라 ta와는 상대 오차 1e-14 수준으로 같다. 앞쪽 NaN이 있는 행은 왼쪽으로
+    당겨 같은 블록 경계로 계산하므로, 오른쪽 정렬한 (티커 x 봉) 배열의 각 행은 티커 하나만
+    계산한 결과와 비트 단위로 같다.
+    """
+    values = _as_rows(values)
+    rows, bars = values.shape
+    result = np.full((rows, bars), np.nan)
+    if bars == 0:
+        return result
+    alpha = 2.0 / (period + 1)
+    decay = 1.0 - alpha
+    starts = _first_valid(values)
+
+    # 행마다 첫 값이 0번 위치에 오도록 왼쪽으로 당긴다
+    shifted = starts.any()
+    if shifted:
+        positions = (np.arange(bars) + np.minimum(starts, bars - 1)[:, None]) % bars
+        aligned = np.take_along_axis(values, positions, axis=1)
+        aligned[np.arange(bars) >= (bars - starts)[:, None]] = 0.
+    else:
+        aligned = values
+
+    # 입력: 첫 값은 그대로(가중치 1), 이후는 a * x
+    inputs = alpha * np.nan_to_num(aligned)
+    inputs[:, 0] = np.nan_to_num(aligned[:, 0])
+
+    if decay > 0:
+        block = int(min(bars, _MAX_BLOCK, max(1, np.log(_BLOCK_GROWTH) // -np.log(decay))))
+        powers = decay ** np.arange(block)
+        inverse = 1.0 / powers
+    else:
+        block, powers, inverse = bars, np.ones(bars), np.ones(bars)
+    state = np.zeros(rows)
+    for begin in range(0, bars, block):
+        end = min(begin + block, bars)
+        width = end - begin
+        if decay > 0:
+            partial = np.cumsum(inputs[:, begin:end] * inverse[:width], axis=1)
+            result[:, begin:end] = powers[:width] * (decay * state[:, None] + partial)
+        else:
+            result[:, begin:end] = inputs[:, begin:end]
+        state = result[:, end - 1]
+    if shifted:
+        np.put_along_axis(result, positions, result.copy(), axis=1)
+
+    # min_periods: 첫 값부터 period개 봉이 쌓이기 전은 NaN
+    result[np.arange(bars) < (starts + period - 1)[:, None]] = np.nan
+    gaps = _has_gaps(values, starts)
+    if gaps.any():
+        result[gaps] = _pandas_rows(values, gaps, lambda frame: frame.ewm(
+            span=period, adjust=False, min_periods=period).mean())
+    return result
+
+
+def _sma_from_cumsum(cumulative, starts, period):
+    rows, width = cumulative.shape
+    bars = width - 1
+    result = np.full((rows, bars), np.nan)
+    if period <= bars:
+        result[:, period - 1:] = (cumulative[:, period:] - cumulative[:, :-period]) / period
+    result[np.arange(bars) < (starts + period - 1)[:, None]] = np.nan
+    return result
+
+
+def sma(values, period):
+    """ta.trend.sma_indicator와 같은 단순 이동평균 (rolling(period).mean())
+
+    누적합의 차이로 모든 봉의 구간 합을 한 번에 구한다. float32 가격(compact_ohlcv)은
+    float64 누적합이 정확하므로 ta와 결과가 거의 항상 비트 단위로 같다.
+    """
+    return moving_averages(values, sma_periods=[period])[('MA', period)][0]
+
+
+def bar_seconds(times):
+    """봉 사이 시간(초). 첫 봉과 앞쪽 빈 칸(NaT)이 낀 위치는 NaN
+
+    times는 DatetimeIndex 또는 datetime64 (봉,) / (티커 x 봉) 배열.
+    """
+    if isinstance(times, pd.DatetimeIndex):
+        times = times.tz_convert(None) if times.tz is not None else times
+    times = np.atleast_2d(np.asarray(times, dtype='datetime64[ns]'))
+    seconds = np.full(times.shape, np.nan)
+    seconds[:, 1:] = np.diff(times, axis=1).astype(np.int64) / 1e9
+    seconds[:, 1:][np.isnat(times[:, 1:]) | np.isnat(times[:, :-1])] = np.nan
+    return seconds
+
+
+def slope(values, seconds):
+    """봉마다의 초당 변화량 (첫 봉은 NaN)"""
+    values = _as_rows(values)
+    result = np.full(values.shape, np.nan)
+    result[:, 1:] = np.diff(values, axis=1) / seconds[:, 1:]
+    return result
+
+
+def moving_averages(close, seconds=None, ema_periods=(), sma_periods=()):
+    """여러 기간의 EMA/SMA와 기울기를 한 번에 계산
+
+    close는 (봉,) 또는 (티커 x 봉) 가격 배열, seconds는 bar_seconds 결과 (None이면 기울기 생략).
+    SMA는 모든 기간이 누적합 하나를 함께 쓴다. 반환값은 {('EMA' | 'MA', 기간): (이동평균, 기울기)}
+    이며 배열 모양은 close와 같다 (기울기가 없으면 None).
+    """
+    values = _as_rows(close)
+    squeeze = np.ndim(close) == 1
+    starts = _first_valid(values)
+    gaps = _has_gaps(values, starts)
+
+    averages = {}
+    for period in dict.fromkeys(ema_periods):
+        averages[('EMA', period)] = ema(values, period)
+    sma_periods = list(dict.fromkeys(sma_periods))
+    if sma_periods:
+        cumulative = np.zeros((values.shape[0], values.shape[1] + 1))
+        np.cumsum(np.nan_to_num(values), axis=1, out=cumulative[:, 1:])
+        for period in sma_periods:
+            average = _sma_from_cumsum(cumulative, starts, period)
+            if gaps.any():
+                average[gaps] = _pandas_rows(values, gaps, lambda frame: frame.rolling(
+                    window=period, min_periods=period).mean())
+            averages[('MA', period)] = average
+
+    result = {}
+    for key, average in averages.items():
+        average_slope = slope(average, seconds) if seconds is not None else None
+        if squeeze:
+            average = average[0]
+            average_slope = average_slope[0] if average_slope is not None else None
+        result[key] = (average, average_slope)
+    return result
+
+
+def main():
+    """ta와 값 차이, 계산 시간 비교"""
+    import ta
+
+    parser = argparse.ArgumentParser(description='이동평균선 커널과 ta 비교')
+    parser.add_argument('--intervals', default='1d,1m', help='쉼표로 구분한 캔들 주기')
+    parser.add_argument('--ema', default='120', help='쉼표로 구분한 EMA 기간')
+    parser.add_argument('--sma', default='111,25,33,49', help='쉼표로 구분한 SMA 기간')
+    args = parser.parse_args()
+    ema_periods = [int(p) for p in args.ema.split(',')]
+    sma_periods = [int(p) for p in args.sma.split(',')]
+
+    keys = list_keys()
+    print(f"{'interval':>8} {'bars':>10} {'ta (ms)':>10} {'kernel (ms)':>12} {'max rel diff':>13}")
+    for interval in args.intervals.split(','):
+        bars, ta_seconds, kernel_seconds, worst = 0, 0.0, 0.0, 0.0
+        for ticker in sorted(t for t, i in keys if i == interval):
+            ohlcv = load_ohlcv(ticker, interval, compact=True)
+            close = ohlcv['close'].astype(np.float64)
+            bars += len(ohlcv)
+
+            start = time.perf_counter()
+            expected = {('EMA', p): ta.trend.ema_indicator(close, window=p).to_numpy() for p in ema_periods}
+            expected.update({('MA', p): ta.trend.sma_indicator(close, window=p).to_numpy() for p in sma_periods})
+            ta_seconds += time.perf_counter() - start
+
+            start = time.perf_counter()
+            result = moving_averages(close.to_numpy(), None, ema_periods, sma_periods)
+            kernel_seconds += time.perf_counter() - start
+
+            for key, values in expected.items():
+                actual = result[key][0]
+                if not np.array_equal(np.isnan(actual), np.isnan(values)):
+                    worst = np.inf
+                    continue
+                valid = ~np.isnan(values)
+                if valid.any():
+                    worst = max(worst, np.max(np.abs(actual[valid] - values[valid]) / np.abs(values[valid])))
+        print(f"{interval:>8} {bars:>10} {ta_seconds * 1000:>10.1f} {kernel_seconds * 1000:>12.1f} {worst:>13.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+import heapq
+import time
+import argparse
+import itertools
+from concurrent.futures import as_completed
+
+import numpy as np
+import pandas as pd
+
+from data_store import load_ohlcv
+from strategy_analysis import analyze_strategy, find_pullback_breakout
+from parameter_sweep import make_grid, build_indicator_bank, _parse_values
+
+RESULT_COLUMNS = ['ema_period', 'ma_long_period', 'tolerance', 'ma_mid_periods', 'compression_period',
+                  'compression_threshold', 'signals', 'matched_signals', 'hit_marks', 'precision', 'recall',
+                  'f_score']
+
+
+def load_marks(path):
+    """표시한 지점 파일 읽기 (CSV 또는 JSON, 컬럼: ticker, interval, time)"""
+    marks = pd.read_json(path) if path.endswith('.json') else pd.read_csv(path)
+    marks['time'] = pd.to_datetime(marks['time'], utc=True)
+    return marks[['ticker', 'interval', 'time']]
+
+
+def mark_positions(index, times):
+    """표시한 시각을 봉 위치로 변환 (그 시각을 포함하는 봉 = 시각 이전 마지막 봉, 데이터 밖은 제외)"""
+    times = pd.DatetimeIndex(times).tz_convert(index.tz)
+    positions = index.searchsorted(times, side='right') - 1
+    return np.unique(positions[(positions >= 0) & (times <= index[-1])])
+
+
+def f_score(precision, recall, beta=1.0):
+    b2 = beta * beta
+    with np.errstate(divide='ignore', invalid='ignore'):
+        score = (1 + b2) * precision * recall / (b2 * precision + recall)
+    return np.nan_to_num(score)
+
+
+class _Target:
+    """표시한 지점이 있는 (티커, 캔들 주기) 하나의 지표 묶음과 표시 주변 위치
+
+    시그널 수는 전체 봉의 비트 배열로, 적중 여부는 표시 주변(±window 봉) 위치만 모은 작은 배열로
+    계산한다. 표시 주변 위치는 near, 표시별 주변 위치 번호는 mark_windows (표시 수 x (2*window+1)).
+    """
+
+    def __init__(self, ohlcv, positions, grid, window):
+        n = len(ohlcv)
+        windows = np.clip(positions[:, None] + np.arange(-window, window + 1), 0, n - 1)
+        self.near, inverse = np.unique(windows, return_inverse=True)
+        self.mark_windows = inverse.reshape(windows.shape)
+        self.marks = len(positions)
+
+        self.ema_slopes, self.sma_slopes, previous_highs = build_indicator_bank(ohlcv, grid)
+        c3 = [np.asarray(find_pullback_breakout(ohlcv, period, threshold, previous_highs[period]), dtype=bool)
+              for period, threshold in itertools.product(grid['compression_period'],
+                                                         grid['compression_threshold'])]
+        self.c3_bits = np.stack([np.packbits(c) for c in c3])
+        self.c3_near = np.stack([c[self.near] for c in c3])
+        positive = {period: slope > 0 for period, slope in self.sma_slopes.items()}
+        self.positive_bits = {period: np.packbits(p) for period, p in positive.items()}
+        self.positive_near = {period: p[self.near] for period, p in positive.items()}
+
+    def hits(self, near):
+        """near(... x 주변 위치) 시그널에서 시그널이 하나라도 있는 표시 수"""
+        return near[..., self.mark_windows].any(axis=-1).sum(axis=-1)
+
+
+def _prepare_targets(marks, grid, window):
+    targets = []
+    for (ticker, interval), group in marks.groupby(['ticker', 'interval']):
+        try:
+            ohlcv = load_ohlcv(ticker, interval, compact=True)
+        except FileNotFoundError:
+            continue
+        positions = mark_positions(ohlcv.index, group['time'])
+        if len(positions):
+            targets.append(_Target(ohlcv, positions, grid, window))
+    return targets
+
+
+def search_grid(marks, grid, window=2, beta=1.0, top=20):
+    """그리드에서 표시한 지점과 가장 잘 맞는 파라미터 top개 탐색
+
+    시그널 = 조건1(ema, long, tolerance) & 조건2(중기 MA) & 조건3(눌림목)이므로 조건을 더할수록
+    시그널은 줄어든다. 따라서 앞 단계 조건만으로 적중한 표시 수가 재현율의 상한이 되고,
+    정밀도 1을 가정한 F 점수 상한이 현재 top번째 점수 이하이면 그 아래 조합을 모두 건너뛴다.
+    전체 봉 시그널 수(정밀도 계산용 popcount)도 표시 주변 적중만으로 만든 상한을 통과한 조합만 센다.
+    반환값은 (결과 표, {'combinations', 'evaluated', 'pruned'}).
+    """
+    targets = _prepare_targets(marks, grid, window)
+    total_marks = sum(target.marks for target in targets)
+    stats = {'combinations': 0, 'evaluated': 0, 'pruned': 0}
+    if total_marks == 0:
+        return pd.DataFrame(columns=RESULT_COLUMNS), stats
+
+    b2 = beta * beta
+    unique_mids = sorted({tuple(sorted(mids)) for mids in grid['ma_mid_periods']})
+    c3_params = list(itertools.product(grid['compression_period'], grid['compression_threshold']))
+    per_tolerance = len(unique_mids) * len(c3_params)
+    stats['combinations'] = len(grid['ema_period']) * len(grid['ma_long_period']) * len(grid['tolerance']) \
+        * per_tolerance
+    mid_bits = [{mids: target.positive_bits[mids[0]] & target.positive_bits[mids[1]] & target.positive_bits[mids[2]]
+                 for mids in unique_mids} for target in targets]
+    mid_near = [{mids: target.positive_near[mids[0]] & target.positive_near[mids[1]] & target.positive_near[mids[2]]
+                 for mids in unique_mids} for target in targets]
+
+    best = []
+    counter = itertools.count()
+
+    def threshold():
+        return best[0][0] if len(best) >= top else -1.
+
+    def bound(hits):
+        recall = hits / total_marks
+        return (1 + b2) * recall / (b2 + recall)
+
+    for ema_period, long_period in itertools.product(grid['ema_period'], grid['ma_long_period']):
+        trends = []
+        for target in targets:
+            ema_slope, long_slope = target.ema_slopes[ema_period], target.sma_slopes[long_period]
+            trends.append(((ema_slope > 0) & (long_slope > 0), np.abs(ema_slope - long_slope)))
+
+        for tolerance in grid['tolerance']:
+            base = [trend_up & (slope_diff < tolerance) for trend_up, slope_diff in trends]
+            base_near = [b[target.near] for b, target in zip(base, targets)]
+            if bound(sum(target.hits(near) for near, target in zip(base_near, targets))) <= threshold():
+                stats['pruned'] += per_tolerance
+                continue
+            base_bits = [np.packbits(b) for b in base]
+
+            for m, mids in enumerate(unique_mids):
+                near = [b & mid_near[t][mids] for t, b in enumerate(base_near)]
+                if bound(sum(target.hits(n) for n, target in zip(near, targets))) <= threshold():
+                    stats['pruned'] += len(c3_params)
+                    continue
+
+                # 눌림목 조합 전체를 표시 주변 위치에서 한 번에 평가
+                combined = [target.c3_near & n for n, target in zip(near, targets)]
+                hits = sum(target.hits(c) for c, target in zip(combined, targets))
+                matched = sum(c.sum(axis=1) for c in combined)
+                survivors = np.flatnonzero(bound(hits) > threshold())
+                stats['pruned'] += len(c3_params) - len(survivors)
+                if len(survivors) == 0:
+                    continue
+                stats['evaluated'] += len(survivors)
+                signals = sum(np.bitwise_count(target.c3_bits[survivors] & (base_bits[t] & mid_bits[t][mids]))
+                              .sum(axis=1, dtype=np.int64) for t, target in enumerate(targets))
+                precision = np.where(signals > 0, matched[survivors] / np.maximum(signals, 1), 0.)
+                recall = hits[survivors] / total_marks
+                scores = f_score(precision, recall, beta)
+                for i, c in enumerate(survivors):
+                    if scores[i] <= threshold():
+                        continue
+                    record = (ema_period, long_period, tolerance, mids, *c3_params[c], int(signals[i]),
+                              int(matched[c]), int(hits[c]), float(precision[i]), float(recall[i]),
+                              float(scores[i]))
+                    item = (float(scores[i]), next(counter), record)
+                    if len(best) < top:
+                        heapq.heappush(best, item)
+                    else:
+                        heapq.heapreplace(best, item)
+
+    rows = [record for _, _, record in sorted(best, key=lambda item: (-item[0], item[1]))]
+    return pd.DataFrame(rows, columns=RESULT_COLUMNS), stats
+
+
+def run_search(marks, grid, window=2, beta=1.0, top=20, executor=None, progress=None):
+    """EMA 기간별로 나눠 프로세스 풀에서 search_grid를 실행하고 결과를 합친다"""
+    from signal_scan import get_executor
+
+    executor = executor or get_executor()
+    futures = [executor.submit(search_grid, marks, dict(grid, ema_period=[period]), window, beta, top)
+               for period in grid['ema_period']]
+    tables, stats = [], {'combinations': 0, 'evaluated': 0, 'pruned': 0}
+    for i, future in enumerate(as_completed(futures)):
+        table, part = future.result()
+        tables.append(table)
+        for key in stats:
+            stats[key] += part[key]
+        if progress is not None:
+            progress(i + 1, len(futures))
+    table = pd.concat([t for t in tables if len(t)], ignore_index=True) if any(len(t) for t in tables) \
+        else pd.DataFrame(columns=RESULT_COLUMNS)
+    table = table.sort_values('f_score', ascending=False, kind='stable').head(top).reset_index(drop=True)
+    return table, stats
+
+
+def score_params(marks, params, window=2, beta=1.0):
+    """analyze_strategy로 한 파라미터 조합의 (시그널 수, 적중 시그널 수, 적중 표시 수, 정밀도, 재현율, F 점수) 계산"""
+    signals = matched = hit = total = 0
+    for (ticker, interval), group in marks.groupby(['ticker', 'interval']):
+        try:
+            ohlcv = load_ohlcv(ticker, interval, compact=True)
+        except FileNotFoundError:
+            continue
+        positions = mark_positions(ohlcv.index, group['time'])
+        _, fired = analyze_strategy(ohlcv, **params)
+        fired = np.flatnonzero(fired.to_numpy())
+        distance = np.abs(fired[:, None] - positions[None, :]) if len(positions) else np.empty((len(fired), 0))
+        signals += len(fired)
+        matched += int((distance <= window).any(axis=1).sum())
+        hit += int((distance <= window).any(axis=0).sum())
+        total += len(positions)
+    precision = matched / signals if signals else 0.
+    recall = hit / total if total else 0.
+    return signals, matched, hit, precision, recall, float(f_score(precision, recall, beta))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='표시한 지점에 맞는 analyze_strategy 파라미터 탐색')
+    parser.add_argument('marks', help='표시한 지점 파일 (CSV/JSON, 컬럼: ticker, interval, time)')
+    parser.add_argument('--ema', default='50:200:10', help='EMA 기간 (예: 50:200:10)')
+    parser.add_argument('--ma-long', default='50:200:10', help='장기 MA 기간')
+    parser.add_argument('--mid1', default='20:40:5', help='첫 번째 중기 MA 기간')
+    parser.add_argument('--mid2', default='25:50:5', help='두 번째 중기 MA 기간')
+    parser.add_argument('--mid3', default='40:60:5', help='세 번째 중기 MA 기간')
+    parser.add_argument('--tolerance', default='1e-6,5e-6,1e-5,5e-5,1e-4', help='평행 허용 오차')
+    parser.add_argument('--compression-period', default='5:50:5', help='눌림목 확인 기간')
+    parser.add_argument('--compression-threshold', default='0.0:0.1:0.01', help='눌림목 허용 범위')
+    parser.add_argument('--window', type=int, default=2, help='표시와 시그널이 이 봉 수 이내면 적중')
+    parser.add_argument('--beta', type=float, default=1.0, help='F 점수의 재현율 가중치')
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--output', help='결과 CSV 파일')
+    args = parser.parse_args()
+
+    marks = load_marks(args.marks)
+    grid = make_grid(
+        ema_period=_parse_values(args.ema, int),
+        ma_long_period=_parse_values(args.ma_long, int),
+        ma_mid_periods=itertools.product(_parse_values(args.mid1, int), _parse_values(args.mid2, int),
+                                         _parse_values(args.mid3, int)),
+        tolerance=_parse_values(args.tolerance, float),
+        compression_period=_parse_values(args.compression_period, int),
+        compression_threshold=_parse_values(args.compression_threshold, float),
+    )
+
+    start = time.perf_counter()
+    table, stats = run_search(marks, grid, args.window, args.beta, args.top,
+                              progress=lambda done, total: print(f"Progress: {done}/{total}"))
+    elapsed = time.perf_counter() - start
+    print(f"{stats['combinations']:,}개 조합 (중기 MA는 순서 무관 조합) 중 {stats['evaluated']:,}개 평가, "
+          f"{stats['pruned']:,}개 가지치기: {elapsed:.1f}s")
+    print(table.to_string(index=False))
+
+    if len(table):
+        best = table.iloc[0]
+        params = {name: best[name] for name in ['ema_period', 'ma_long_period', 'tolerance', 'ma_mid_periods',
+                                                'compression_period', 'compression_threshold']}
+        print("analyze_strategy 검증:", score_params(marks, params, args.window, args.beta))
+    if args.output:
+        table.assign(ma_mid_periods=table['ma_mid_periods'].astype(str)).to_csv(args.output, index=False)
+        print(f"Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+import time
+import argparse
+import itertools
+import numpy as np
+import pandas as pd
+from concurrent.futures import as_completed
+
+from data_store import load_ohlcv, list_keys
+from strategy_analysis import find_pullback_breakout, rolling_previous_high
+from indicators import moving_averages, bar_seconds
+
+PARAM_NAMES = ['ema_period', 'ma_long_period', 'tolerance', 'ma_mid_periods',
+               'compression_period', 'compression_threshold']
+
+# 한 번에 비트 연산할 (중기 MA 조합 x 눌림목 조합) 블록의 최대 바이트 수
+CHUNK_BYTES = 32 * 1024 * 1024
+
+
+def make_grid(ema_period, ma_long_period, ma_mid_periods, tolerance,
+              compression_period, compression_threshold):
+    """파라미터 그리드 생성
+
+    ma_mid_periods는 (기간, 기간, 기간) 튜플의 리스트. 각 값은 모두 리스트로 받는다.
+    """
+    return {
+        'ema_period': list(ema_period),
+        'ma_long_period': list(ma_long_period),
+        'tolerance': list(tolerance),
+        'ma_mid_periods': [tuple(p) for p in ma_mid_periods],
+        'compression_period': list(compression_period),
+        'compression_threshold': list(compression_threshold),
+    }
+
+
+def grid_shape(grid):
+    return tuple(len(grid[name]) for name in PARAM_NAMES)
+
+
+def _packed(condition):
+    """불리언 시리즈를 비트 배열로 압축 (NaN 비교 결과는 False)"""
+    return np.packbits(np.asarray(condition, dtype=bool))
+
+
+def build_indicator_bank(ohlcv, grid):
+    """그리드에 필요한 모든 이동평균선 기울기를 기간별로 한 번씩만 계산
+
+    analyze_strategy와 같은 indicators 커널로 모든 기간을 한 번에 계산하므로 결과 시그널 수가 동일하다.
+    """
+    sma_periods = set(grid['ma_long_period']) | {p for mids in grid['ma_mid_periods'] for p in mids}
+    averages = moving_averages(ohlcv['close'].to_numpy(dtype=np.float64), bar_seconds(ohlcv.index),
+                               ema_periods=sorted(set(grid['ema_period'])), sma_periods=sorted(sma_periods))
+    ema_slopes = {period: averages[('EMA', period)][1] for period in set(grid['ema_period'])}
+    sma_slopes = {period: averages[('MA', period)][1] for period in sma_periods}
+
+    previous_highs = {period: rolling_previous_high(ohlcv['high'], period)
+                      for period in set(grid['compression_period'])}
+    return ema_slopes, sma_slopes, previous_highs
+
+
+def sweep_frame(ohlcv, grid):
+    """하나의 OHLCV 데이터에 대해 그리드의 모든 조합별 시그널 수 계산
+
+    시그널 = 조건1(ema, long, tolerance) & 조건2(ema, long, 중기 MA) & 조건3(눌림목)
+    으로 분해되므로, 각 조건을 비트 배열로 한 번씩 만든 뒤 AND/popcount로 조합한다.
+    반환값은 grid_shape(grid) 모양의 정수 배열.
+    """
+    ema_slopes, sma_slopes, previous_highs = build_indicator_bank(ohlcv, grid)
+    counts = np.zeros(grid_shape(grid), dtype=np.int32)
+    if len(ohlcv) == 0:
+        return counts
+
+    # 조건 3: (눌림목 확인 기간, 허용 범위) 조합별 비트 배열
+    c3_params = list(itertools.product(range(len(grid['compression_period'])),
+                                       range(len(grid['compression_threshold']))))
+    c3_bits = np.stack([
+        _packed(find_pullback_breakout(ohlcv, grid['compression_period'][p], grid['compression_threshold'][t],
+                                       previous_highs[grid['compression_period'][p]]))
+        for p, t in c3_params
+    ])
+
+    # 중기 MA 양의 기울기: 순서와 무관하므로 정렬한 조합만 계산하고 나중에 펼친다
+    canonical = [tuple(sorted(mids)) for mids in grid['ma_mid_periods']]
+    unique_mids = sorted(set(canonical))
+    position = {mids: i for i, mids in enumerate(unique_mids)}
+    mid_index = np.array([position[mids] for mids in canonical])
+    positive = {period: _packed(slope > 0) for period, slope in sma_slopes.items()}
+    mid_bits = np.stack([positive[a] & positive[b] & positive[c] for a, b, c in unique_mids])
+
+    nbytes = c3_bits.shape[1]
+    chunk = max(1, CHUNK_BYTES // max(1, nbytes * len(c3_params)))
+
+    for e, ema_period in enumerate(grid['ema_period']):
+        ema_slope = ema_slopes[ema_period]
+        for l, long_period in enumerate(grid['ma_long_period']):
+            long_slope = sma_slopes[long_period]
+            # 조건 2 중 EMA와 장기 MA의 양의 기울기
+            trend_up = (ema_slope > 0) & (long_slope > 0)
+            slope_diff = abs(ema_slope - long_slope)
+            for k, tolerance in enumerate(grid['tolerance']):
+                base = _packed(trend_up & (slope_diff < tolerance))
+                if not base.any():
+                    continue
+                unique_counts = np.empty((len(unique_mids), len(c3_params)), dtype=np.int32)
+                for start in range(0, len(unique_mids), chunk):
+                    block = mid_bits[start:start + chunk] & base
+                    combined = block[:, None, :] & c3_bits[None, :, :]
+                    unique_counts[start:start + chunk] = np.bitwise_count(combined).sum(axis=2)
+                counts[e, l, k] = unique_counts[mid_index].reshape(
+                    len(mid_index), len(grid['compression_period']), len(grid['compression_threshold']))
+    return counts
+
+
+def sweep_ticker(ticker, interval, grid):
+    """저장소의 (티커, 캔들 주기) 데이터로 그리드 전체의 시그널 수 계산"""
+    data = load_ohlcv(ticker, interval, compact=True)
+    return sweep_frame(data, grid)
+
+
+def counts_to_frame(counts, grid, **labels):
+    """grid_shape 모양의 시그널 수 배열을 (파라미터..., signals) 표로 변환"""
+    index = pd.MultiIndex.from_product([grid[name] for name in PARAM_NAMES], names=PARAM_NAMES)
+    frame = pd.DataFrame({'signals': counts.reshape(-1)}, index=index).reset_index()
+    for name, value in labels.items():
+        frame.insert(0, name, value)
+    return frame
+
+
+def run_sweep(tickers, intervals, grid, executor=None, progress=None):
+    """여러 티커와 캔들 주기에 대해 그리드 탐색을 프로세스 풀에서 병렬 실행
+
+    반환값은 {(티커, 캔들 주기): 시그널 수 배열}. progress(완료 수, 전체 수)가 주어지면
+    작업이 끝날 때마다 호출한다.
+    """
+    from signal_scan import get_executor
+
+    executor = executor or get_executor()
+    futures = {
+        executor.submit(sweep_ticker, ticker, interval, grid): (ticker, interval)
+        for interval in intervals for ticker in tickers
+    }
+    results = {}
+    for i, future in enumerate(as_completed(futures)):
+        try:
+            results[futures[future]] = future.result()
+        except FileNotFoundError:
+            pass
+        if progress is not None:
+            progress(i + 1, len(futures))
+    return results
+
+
+def _parse_values(text, cast):
+    """'50:200:10' (끝 포함 범위) 또는 '1e-6,2e-6' (목록) 형식 파싱"""
+    if ':' in text:
+        start, stop, step = (text.split(':') + ['1'])[:3]
+        start, stop, step = cast(start), cast(stop), cast(step)
+        values = np.arange(start, stop + step / 2, step)
+        return [cast(round(v, 12)) for v in values]
+    return [cast(v) for v in text.split(',')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='analyze_strategy 파라미터 그리드 탐색')
+    parser.add_argument('--tickers', help='쉼표로 구분한 티커 (기본: 저장된 전체 티커)')
+    parser.add_argument('--intervals', default='1d', help='쉼표로 구분한 캔들 주기')
+    parser.add_argument('--ema', default='120', help='EMA 기간 (예: 50:200:10)')
+    parser.add_argument('--ma-long', default='111', help='장기 MA 기간')
+    parser.add_argument('--mid1', default='25', help='첫 번째 중기 MA 기간')
+    parser.add_argument('--mid2', default='33', help='두 번째 중기 MA 기간')
+    parser.add_argument('--mid3', default='49', help='세 번째 중기 MA 기간')
+    parser.add_argument('--tolerance', default='1e-6', help='평행 허용 오차')
+    parser.add_argument('--compression-period', default='20', help='눌림목 확인 기간')
+    parser.add_argument('--compression-threshold', default='0.05', help='눌림목 허용 범위')
+    parser.add_argument('--aggregate', action='store_true', help='티커별 결과를 합산해 저장')
+    parser.add_argument('--output', default='sweep_results.csv', help='결과 파일 (.csv 또는 .parquet)')
+    args = parser.parse_args()
+
+    intervals = args.intervals.split(',')
+    if args.tickers:
+        tickers = args.tickers.split(',')
+    else:
+        tickers = sorted({ticker for ticker, interval in list_keys() if interval in intervals})
+
+    grid = make_grid(
+        ema_period=_parse_values(args.ema, int),
+        ma_long_period=_parse_values(args.ma_long, int),
+        ma_mid_periods=itertools.product(_parse_values(args.mid1, int), _parse_values(args.mid2, int),
+                                         _parse_values(args.mid3, int)),
+        tolerance=_parse_values(args.tolerance, float),
+        compression_period=_parse_values(args.compression_period, int),
+        compression_threshold=_parse_values(args.compression_threshold, float),
+    )
+    combinations = int(np.prod(grid_shape(grid)))
+    print(f"{combinations}개 조합 x {len(tickers)}개 종목 x {len(intervals)}개 캔들 주기")
+
+    start = time.perf_counter()
+    results = run_sweep(tickers, intervals, grid,
+                        progress=lambda done, total: print(f"Progress: {done}/{total}"))
+    elapsed = time.perf_counter() - start
+
+    if args.aggregate:
+        # 결과가 없는 캔들 주기(모든 티커 실패/제외)는 건너뛴다
+        frames = [counts_to_frame(sum(counts for (t, i), counts in results.items() if i == interval), grid,
+                                  interval=interval)
+                  for interval in intervals if any(i == interval for _, i in results)]
+    else:
+        frames = [counts_to_frame(counts, grid, ticker=ticker, interval=interval)
+                  for (ticker, interval), counts in sorted(results.items())]
+    if not frames:
+        print("결과가 없습니다 (지정한 종목/캔들 주기에 데이터 없음)")
+        return
+    table = pd.concat(frames, ignore_index=True)
+    table['ma_mid_periods'] = table['ma_mid_periods'].astype(str)
+    if args.output.endswith('.parquet'):
+        table.to_parquet(args.output)
+    else:
+        table.to_csv(args.output, index=False)
+
+    evaluated = combinations * len(results)
+    print(f"{evaluated}개 조합 평가 완료: {elapsed:.1f}s ({evaluated / max(elapsed, 1e-9) * 60:,.0f}개/분)")
+    print(f"Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+import os
+import json
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from data_store import load_ohlcv, list_keys, data_version, DATA_DIR
+
+INDEX_PATH = os.path.join(DATA_DIR, 'pattern_index.npz')
+
+# FFT 거리로 고른 뒤 정확한 거리로 다시 계산할 후보 수 (k의 배수)
+RERANK_FACTOR = 2
+# 분산이 거의 없는(가격이 멈춘) 구간은 z 정규화가 의미 없으므로 제외
+MIN_WINDOW_STD = 1e-8
+
+
+def _znorm(values):
+    values = np.asarray(values, dtype=np.float64)
+    std = values.std()
+    return (values - values.mean()) / std if std > 0 else values - values.mean()
+
+
+class PatternIndex:
+    """전체 (티커, 캔들 주기) 종가를 이어 붙인 유사 차트 검색 인덱스
+
+    종가는 시리즈마다 z 정규화해서 하나의 배열로 이어 붙이고(구간별 z 정규화 거리는 시리즈 단위
+    선형 변환에 영향을 받지 않는다), 그 FFT와 누적합을 미리 계산해 둔다. 검색은 MASS 방식으로
+    질의 구간과 모든 위치의 내적을 FFT 한 번으로 구한 뒤 z 정규화 유클리드 거리로 바꾼다.
+    """
+
+    def __init__(self, keys, lengths, values, times, versions=None):
+        self.keys = [tuple(key) for key in keys]
+        self.lengths = np.asarray(lengths, dtype=np.int64)
+        self.starts = np.r_[0, np.cumsum(self.lengths)[:-1]].astype(np.int64)
+        self.values = np.asarray(values, dtype=np.float64)
+        self.times = np.asarray(times, dtype=np.int64)
+        self.versions = versions or {}
+        self.series = np.repeat(np.arange(len(self.keys)), self.lengths)
+
+        size = len(self.values)
+        self.fft_size = 1 << max(1, int(size - 1).bit_length())
+        self._spectrum = np.fft.rfft(self.values, self.fft_size)
+        self._cumsum = np.r_[0., np.cumsum(self.values)]
+        self._cumsum_sq = np.r_[0., np.cumsum(self.values ** 2)]
+        self._position = {key: i for i, key in enumerate(self.keys)}
+
+    @classmethod
+    def build(cls, keys=None):
+        """저장소(또는 CSV)에서 종가를 읽어 인덱스 생성"""
+        keys = keys if keys is not None else list_keys()
+        used, lengths, values, times, versions = [], [], [], [], {}
+        for ticker, interval in keys:
+            try:
+                close = load_ohlcv(ticker, interval, columns=['close'], compact=True)['close']
+            except FileNotFoundError:
+                continue
+            if len(close) < 2:
+                continue
+            used.append((ticker, interval))
+            lengths.append(len(close))
+            values.append(_znorm(close.to_numpy()))
+            times.append(close.index.tz_convert('UTC').tz_localize(None).asi8)
+            versions[f'{ticker}/{interval}'] = data_version(ticker, interval)
+        if not used:
+            return cls([], [], np.empty(0), np.empty(0, dtype=np.int64), versions)
+        return cls(used, lengths, np.concatenate(values), np.concatenate(times), versions)
+
+    def save(self, path=INDEX_PATH):
+        """npz로 원자적 저장 (FFT와 누적합은 불러올 때 다시 계산)"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = path + '.tmp.npz'
+        np.savez(tmp_path, values=self.values, times=self.times, lengths=self.lengths,
+                 meta=np.array(json.dumps({'keys': self.keys, 'versions': self.versions})))
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path=INDEX_PATH):
+        with np.load(path) as data:
+            meta = json.loads(str(data['meta']))
+            return cls(meta['keys'], data['lengths'], data['values'], data['times'], meta['versions'])
+
+    def __contains__(self, key):
+        return tuple(key) in self._position
+
+    def window(self, ticker, interval, start=None, end=None):
+        """(티커, 캔들 주기)의 [start, end] 구간 (시리즈 안 시작 위치, 봉 수)"""
+        series = self._position[(ticker, interval)]
+        offset, length = self.starts[series], self.lengths[series]
+        times = self.times[offset:offset + length]
+        first = 0 if start is None else int(np.searchsorted(times, _utc_ns(start), side='left'))
+        last = length if end is None else int(np.searchsorted(times, _utc_ns(end), side='right'))
+        return first, last - first
+
+    def search(self, query, k=10, intervals=None, exclude=None, exclusion=None):
+        """query(가격 배열)와 z 정규화 거리가 가장 가까운 구간 k개
+
+        intervals로 캔들 주기를 제한할 수 있고, exclude=(티커, 캔들 주기, 시작 위치)는 질의 자신과
+        겹치는 구간을 제외한다. 같은 시리즈에서 exclusion(기본: 질의 길이의 절반)보다 가까운
+        결과는 하나만 남긴다. 반환값은 [ticker, interval, start, end, bars, distance] 표.
+        """
+        query = np.asarray(query, dtype=np.float64)
+        m = len(query)
+        columns = ['ticker', 'interval', 'start', 'end', 'bars', 'distance']
+        if m < 2 or len(self.values) < m or query.std() == 0:
+            return pd.DataFrame(columns=columns)
+        exclusion = m // 2 if exclusion is None else exclusion
+        q = _znorm(query)
+
+        # 모든 시작 위치 i에 대해 sum(values[i:i+m] * q)를 FFT 한 번으로 계산
+        product = np.fft.irfft(self._spectrum * np.fft.rfft(q[::-1], self.fft_size), self.fft_size)
+        dot = product[m - 1:len(self.values)]
+        total = self._cumsum[m:] - self._cumsum[:-m]
+        mean = total / m
+        var = (self._cumsum_sq[m:] - self._cumsum_sq[:-m]) / m - mean ** 2
+        std = np.sqrt(np.maximum(var, 0.))
+        # q는 평균 0, 표준편차 1이므로 거리^2 = 2m(1 - dot / (m * std))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            distance = 2 * m * (1 - dot / (m * std))
+
+        # 시리즈 경계를 넘는 구간, 평평한 구간, 제외할 캔들 주기/질의 구간은 후보에서 뺀다
+        positions = np.arange(len(dot))
+        series = self.series[:len(dot)]
+        valid = positions + m <= (self.starts + self.lengths)[series]
+        valid &= std > MIN_WINDOW_STD
+        if intervals is not None:
+            allowed = np.array([interval in intervals for _, interval in self.keys])
+            valid &= allowed[series]
+        if exclude is not None:
+            ticker, interval, start = exclude
+            if (ticker, interval) in self._position:
+                offset = self.starts[self._position[(ticker, interval)]] + start
+                valid[max(0, offset - m + 1):offset + m] = False
+        distance[~valid] = np.inf
+
+        # 같은 시리즈에서 exclusion보다 가까운 위치를 지워 가며 FFT 거리 순으로 후보를 고른 뒤
+        # 정확한 거리로 다시 계산해 k개 선택
+        ends = (self.starts + self.lengths)[series]
+        exclusion = max(exclusion, 1)
+        candidates = []
+        for _ in range(k * RERANK_FACTOR):
+            position = int(np.argmin(distance))
+            if not np.isfinite(distance[position]):
+                break
+            candidates.append(position)
+            low = max(self.starts[series[position]], position - exclusion + 1)
+            distance[low:min(position + exclusion, ends[position])] = np.inf
+        exact = [np.sum((_znorm(self.values[i:i + m]) - q) ** 2) for i in candidates]
+        picked = sorted(zip(candidates, exact), key=lambda item: item[1])[:k]
+
+        rows = []
+        for position, value in picked:
+            series = self.series[position]
+            ticker, interval = self.keys[series]
+            rows.append({
+                'ticker': ticker,
+                'interval': interval,
+                'start': pd.Timestamp(self.times[position], tz='UTC'),
+                'end': pd.Timestamp(self.times[position + m - 1], tz='UTC'),
+                'bars': m,
+                'distance': float(np.sqrt(max(value, 0.))),
+            })
+        return pd.DataFrame(rows, columns=columns)
+
+    def search_window(self, ticker, interval, start=None, end=None, k=10, intervals=None):
+        """인덱스에 있는 (티커, 캔들 주기)의 [start, end] 구간을 질의로 검색 (자기 자신과 겹치는 구간 제외)"""
+        first, bars = self.window(ticker, interval, start, end)
+        offset = self.starts[self._position[(ticker, interval)]] + first
+        return self.search(self.values[offset:offset + bars], k, intervals, exclude=(ticker, interval, first))
+
+    def normalized(self, ticker, interval, start, bars):
+        """결과 구간의 z 정규화 종가 (비교 차트용)"""
+        offset = self.starts[self._position[(ticker, interval)]]
+        times = self.times[offset:offset + self.lengths[self._position[(ticker, interval)]]]
+        first = int(np.searchsorted(times, _utc_ns(start), side='left'))
+        return _znorm(self.values[offset + first:offset + first + bars])
+
+
+def _utc_ns(value):
+    value = pd.Timestamp(value)
+    value = value.tz_convert('UTC') if value.tzinfo is not None else value.tz_localize('UTC')
+    return value.tz_localize(None).value
+
+
+def main():
+    parser = argparse.ArgumentParser(description='유사 차트 검색 인덱스 생성 및 검색')
+    parser.add_argument('--build', action='store_true', help='인덱스를 새로 만들어 저장')
+    parser.add_argument('--output', default=INDEX_PATH)
+    parser.add_argument('--ticker', default='AAPL')
+    parser.add_argument('--interval', default='1d')
+    parser.add_argument('--start', help='질의 구간 시작 (기본: 마지막 60봉)')
+    parser.add_argument('--end', help='질의 구간 끝')
+    parser.add_argument('-k', type=int, default=10)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.build or not os.path.exists(args.output):
+        index = PatternIndex.build()
+        index.save(args.output)
+        print(f"{len(index.keys)} series, {len(index.values)} bars -> {args.output} "
+              f"({time.perf_counter() - start:.1f}s)")
+    else:
+        index = PatternIndex.load(args.output)
+        print(f"Loaded {len(index.keys)} series, {len(index.values)} bars ({time.perf_counter() - start:.2f}s)")
+
+    query_start = args.start
+    if query_start is None:
+        first, bars = index.window(args.ticker, args.interval)
+        offset = index.starts[index.keys.index((args.ticker, args.interval))]
+        query_start = pd.Timestamp(index.times[offset + max(0, bars - 60)], tz='UTC')
+    start = time.perf_counter()
+    result = index.search_window(args.ticker, args.interval, query_start, args.end, args.k)
+    print(f"Query {args.ticker} ({args.interval}) from {query_start}: {(time.perf_counter() - start) * 1000:.0f}ms")
+    print(result.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import os
+import json
+import time
+import threading
+from functools import wraps
+from contextlib import contextmanager
+
+# 현재 스레드(Streamlit은 세션마다 스크립트를 별도 스레드에서 실행)에서 기록 중인 Profiler
+_local = threading.local()
+
+
+class Profiler:
+    """단계별 실행 시간을 재실행(run) 단위로 기록하고 누적하는 프로파일러
+
+    stage()/timed()로 잰 시간은 현재 재실행의 단계별 시간(last_run)과 누적 통계
+    (횟수, 합계, 최대)에 더해진다. parent를 주면 같은 값을 parent에도 기록하므로, 세션별
+    프로파일러와 프로세스 전체 프로파일러를 함께 쓸 수 있다. 기록은 perf_counter 두 번과
+    딕셔너리 갱신뿐이라 운영 환경에서 켜 둬도 된다.
+    """
+
+    def __init__(self, parent=None):
+        self.parent = parent
+        self.runs = 0
+        self.last_run = {}
+        self.totals = {}
+        self._current = None
+        self._run_start = None
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self._lock:
+            if self._current is not None:
+                self._current[name] = self._current.get(name, 0.0) + seconds
+            count, total, longest = self.totals.get(name, (0, 0.0, 0.0))
+            self.totals[name] = (count + 1, total + seconds, max(longest, seconds))
+        if self.parent is not None:
+            self.parent.record(name, seconds)
+
+    def start_run(self):
+        """새 재실행 기록 시작 (이 스레드의 stage()/timed()가 이 프로파일러에 기록된다)"""
+        with self._lock:
+            self._current = {}
+        self._run_start = time.perf_counter()
+        _local.profiler = self
+
+    def finish_run(self, name='rerun'):
+        """재실행 기록 종료. 전체 시간은 name 단계로 기록하고 last_run을 바꾼다"""
+        self.record(name, time.perf_counter() - self._run_start)
+        with self._lock:
+            self.last_run, self._current = self._current, None
+            self.runs += 1
+        if self.parent is not None:
+            with self.parent._lock:
+                self.parent.runs += 1
+        if getattr(_local, 'profiler', None) is self:
+            _local.profiler = None
+        return self.last_run
+
+    def summary(self):
+        """{단계: {count, total_seconds, mean_seconds, max_seconds, last_seconds}}"""
+        with self._lock:
+            return {
+                name: {
+                    'count': count,
+                    'total_seconds': total,
+                    'mean_seconds': total / count,
+                    'max_seconds': longest,
+                    'last_seconds': self.last_run.get(name),
+                }
+                for name, (count, total, longest) in self.totals.items()
+            }
+
+    def to_json(self):
+        return json.dumps({'runs': self.runs, 'stages': self.summary()}, indent=2)
+
+    def to_prometheus(self, prefix='chartmark_stage', labels=None):
+        """Prometheus 텍스트 형식 (단계별 누적 횟수/합계 summary와 최대값 gauge)"""
+        base = ''.join(f',{key}="{value}"' for key, value in (labels or {}).items())
+        lines = [
+            f'# HELP {prefix}_seconds Time spent per app stage.',
+            f'# TYPE {prefix}_seconds summary',
+        ]
+        stats = self.summary()
+        for name, stat in stats.items():
+            lines.append(f'{prefix}_seconds_count{{stage="{name}"{base}}} {stat["count"]}')
+            lines.append(f'{prefix}_seconds_sum{{stage="{name}"{base}}} {stat["total_seconds"]:.6f}')
+        lines += [
+            f'# HELP {prefix}_max_seconds Longest single run of each app stage.',
+            f'# TYPE {prefix}_max_seconds gauge',
+        ]
+        for name, stat in stats.items():
+            lines.append(f'{prefix}_max_seconds{{stage="{name}"{base}}} {stat["max_seconds"]:.6f}')
+        lines += [
+            f'# HELP {prefix}_runs_total Recorded reruns.',
+            f'# TYPE {prefix}_runs_total counter',
+            f'{prefix}_runs_total{"{" + base[1:] + "}" if base else ""} {self.runs}',
+        ]
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path, **kwargs):
+        """node_exporter textfile collector 등이 읽을 수 있도록 파일에 원자적으로 저장"""
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(self.to_prometheus(**kwargs))
+        os.replace(tmp_path, path)
+
+
+def current():
+    """이 스레드에서 기록 중인 Profiler (없으면 None)"""
+    return getattr(_local, 'profiler', None)
+
+
+@contextmanager
+def stage(name):
+    """with 블록 실행 시간을 현재 Profiler에 name 단계로 기록 (기록 중이 아니면 아무것도 안 함)"""
+    profiler = current()
+    if profiler is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profiler.record(name, time.perf_counter() - start)
+
+
+def timed(name=None):
+    """함수 실행 시간을 현재 Profiler에 기록하는 데코레이터 (기본 이름은 함수 이름)"""
+    def decorator(function):
+        stage_name = name or function.__name__
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with stage(stage_name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,191 @@
+import os
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from data_store import (load_ohlcv, save_ohlcv, append_ohlcv, data_version, store_path, list_keys,
+                        MARKET_TZ, STORE_DIR, DATA_DIR, OHLCV_COLUMNS)
+
+# 직접 수집하는 캔들 주기. 나머지는 이 데이터에서 만든다.
+# 1분봉은 조회 기간이 7일뿐이라 60일치 분봉의 기준이 될 수 없고, 2분봉으로는 5/15분봉을 만들 수 없어
+# 5분봉을 분봉 기준으로, 1시간봉(730일)을 60분봉 기준으로 둔다.
+BASE_INTERVALS = ["1m", "2m", "5m", "1h", "1d"]
+
+# 파생 캔들 주기: (기준 캔들 주기, 분 단위 길이 또는 일봉 이상 규칙)
+DERIVED_INTERVALS = {
+    "15m": ("5m", 15),
+    "30m": ("5m", 30),
+    "90m": ("5m", 90),
+    "60m": ("1h", 60),
+    "5d": ("1d", "5d"),
+    "1wk": ("1d", "1wk"),
+    "1mo": ("1d", "1mo"),
+    "3mo": ("1d", "3mo"),
+}
+
+# 분봉 묶음의 기준이 되는 정규장 시작 시각(분)
+SESSION_OPEN_MINUTES = 9 * 60 + 30
+
+
+def _aggregate(base, keys, labels):
+    """정렬된 묶음 번호(keys)별로 OHLCV 재집계 (시가=첫 값, 고가=최대, 저가=최소, 종가=마지막, 거래량=합)"""
+    if len(base) == 0:
+        return base[OHLCV_COLUMNS].iloc[:0]
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], len(base)] - 1
+    aggregated = {
+        'open': base['open'].to_numpy()[starts],
+        'high': np.fmax.reduceat(base['high'].to_numpy(), starts),
+        'low': np.fmin.reduceat(base['low'].to_numpy(), starts),
+        'close': base['close'].to_numpy()[ends],
+        'volume': np.add.reduceat(base['volume'].fillna(0).to_numpy(), starts),
+    }
+    index = pd.DatetimeIndex(labels[starts]).tz_localize(MARKET_TZ)
+    index.name = base.index.name
+    return pd.DataFrame(aggregated, index=index)
+
+
+def resample_intraday(base, minutes):
+    """분봉을 minutes분 봉으로 재집계 (매일 9:30 정규장 시작 기준으로 묶음)"""
+    local = base.index.tz_convert(MARKET_TZ).tz_localize(None)
+    day = local.normalize()
+    offset = (local - day) // pd.Timedelta(minutes=1) - SESSION_OPEN_MINUTES
+    bucket = offset // minutes
+    keys = day.asi8 // (60 * 10 ** 9) + bucket
+    labels = (day + pd.to_timedelta(SESSION_OPEN_MINUTES + bucket * minutes, unit='min')).to_numpy()
+    return _aggregate(base, np.asarray(keys), labels)
+
+
+def resample_daily(base, rule, anchor=None):
+    """일봉을 5d/1wk/1mo/3mo 봉으로 재집계
+
+    1wk는 월요일, 1mo는 매월 1일 시작. 5d는 거래일(일봉) 5개 단위로 anchor 봉(없으면 첫 일봉)이 묶음의
+    첫 봉이 되게 묶고, 3mo(3개월 단위)는 anchor의 달(없으면 1월)부터 묶어 기존 저장 데이터와 봉 경계가 같게 한다.
+    """
+    day = base.index.tz_convert(MARKET_TZ).tz_localize(None).normalize()
+    if rule == '1wk':
+        labels = day - pd.to_timedelta(day.weekday, unit='D')
+    elif rule == '5d':
+        first = day.searchsorted(pd.Timestamp(anchor).tz_localize(None).normalize()) if anchor is not None else 0
+        bucket = (np.arange(len(day)) - first) // 5
+        labels = day.to_numpy()[np.maximum(first + bucket * 5, 0)]
+        return _aggregate(base, bucket, labels)
+    elif rule in ('1mo', '3mo'):
+        months = day.year * 12 + day.month - 1
+        if rule == '3mo':
+            first = pd.Timestamp(anchor).month - 1 if anchor is not None else 0
+            months = months - (months - first) % 3
+        labels = pd.to_datetime({'year': months // 12, 'month': months % 12 + 1, 'day': 1})
+        labels = pd.DatetimeIndex(labels)
+    else:
+        raise ValueError(f'Unknown rule: {rule}')
+    labels = pd.DatetimeIndex(labels).to_numpy()
+    return _aggregate(base, labels.astype(np.int64), labels)
+
+
+def derive_ohlcv(base, interval, anchor=None):
+    """기준 캔들 주기 데이터로 파생 캔들 주기 데이터 만들기"""
+    _, rule = DERIVED_INTERVALS[interval]
+    if isinstance(rule, int):
+        return resample_intraday(base, rule)
+    return resample_daily(base, rule, anchor)
+
+
+def _stored_bounds(ticker, interval, store_dir=STORE_DIR, data_dir=DATA_DIR):
+    """이미 저장된 파생 캔들 주기 데이터의 (첫 봉, 마지막 봉) 시각 (없으면 None)"""
+    try:
+        existing = load_ohlcv(ticker, interval, columns=[], store_dir=store_dir, data_dir=data_dir)
+    except FileNotFoundError:
+        return None
+    return (existing.index[0], existing.index[-1]) if len(existing) else None
+
+
+def load_derived(ticker, interval, store_dir=STORE_DIR, data_dir=DATA_DIR):
+    """파생 캔들 주기 데이터
+
+    처음 사용할 때 기준 데이터로 만들어 store_dir/derived에 저장하고, 기준 데이터가 바뀌면 다시 만든다.
+    """
+    base_interval, _ = DERIVED_INTERVALS[interval]
+    base_version = data_version(ticker, base_interval, store_dir, data_dir)
+    if base_version is None:
+        raise FileNotFoundError(f'No data for {ticker} ({interval}) or its base interval {base_interval}')
+
+    derived_dir = os.path.join(store_dir, 'derived')
+    path = store_path(ticker, interval, derived_dir)
+    if os.path.exists(path) and os.stat(path).st_mtime_ns >= base_version:
+        return load_ohlcv(ticker, interval, store_dir=derived_dir, data_dir=derived_dir)
+    base = load_ohlcv(ticker, base_interval, columns=OHLCV_COLUMNS, store_dir=store_dir, data_dir=data_dir)
+    derived = derive_ohlcv(base, interval)
+    save_ohlcv(derived, ticker, interval, derived_dir)
+    return derived
+
+
+def update_derived(ticker, intervals=None, store_dir=STORE_DIR, data_dir=DATA_DIR):
+    """수집한 기준 데이터로 파생 캔들 주기 데이터를 만들어 저장소에 이어서 저장
+
+    저장된 데이터가 있으면 마지막 봉부터 이어서 만들고, 마지막 봉은 새로 만든 값으로 바뀐다.
+    5d는 저장된 마지막 봉에서부터 거래일 5개씩 묶으며, 그 봉이 기준 데이터에 없어 경계를 맞출 수 없으면
+    이어 붙이지 않는다. 반환값은 {캔들 주기: 추가된 봉 수}.
+    """
+    added = {}
+    for interval in intervals or DERIVED_INTERVALS:
+        base_interval, rule = DERIVED_INTERVALS[interval]
+        try:
+            base = load_ohlcv(ticker, base_interval, columns=OHLCV_COLUMNS, store_dir=store_dir, data_dir=data_dir)
+        except FileNotFoundError:
+            continue
+        bounds = _stored_bounds(ticker, interval, store_dir, data_dir)
+        if bounds is None:
+            derived = derive_ohlcv(base, interval)
+        else:
+            first, last = bounds
+            if rule == '5d' and last not in base.index:
+                continue
+            derived = derive_ohlcv(base, interval, last if rule == '5d' else first)
+            derived = derived[derived.index >= last]
+        if len(derived):
+            _, added[interval] = append_ohlcv(derived, ticker, interval, store_dir, data_dir)
+    return added
+
+
+def compare_with_downloaded(ticker, interval, rtol=1e-4):
+    """파생 데이터와 직접 받은 데이터의 겹치는 봉 비교: (겹친 봉 수, OHLC 일치 비율, 거래량 일치 비율)"""
+    base_interval, _ = DERIVED_INTERVALS[interval]
+    downloaded = load_ohlcv(ticker, interval, columns=OHLCV_COLUMNS)
+    base = load_ohlcv(ticker, base_interval, columns=OHLCV_COLUMNS)
+    derived = derive_ohlcv(base, interval, downloaded.index[0] if len(downloaded) else None)
+    # 기준 데이터의 처음/마지막 봉은 구간 일부만 포함할 수 있으므로 제외
+    common = derived.index[1:-1].intersection(downloaded.index)
+    if len(common) == 0:
+        return 0, np.nan, np.nan
+    a, b = derived.loc[common], downloaded.loc[common]
+    prices = np.isclose(a[['open', 'high', 'low', 'close']], b[['open', 'high', 'low', 'close']], rtol=rtol).all(axis=1)
+    volume = np.isclose(a['volume'], b['volume'], rtol=1e-3)
+    return len(common), prices.mean(), volume.mean()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='파생 캔들 주기와 직접 받은 데이터 비교')
+    parser.add_argument('--tickers', help='쉼표로 구분한 티커 (기본: 저장된 전체 티커)')
+    args = parser.parse_args()
+    keys = set(list_keys())
+    tickers = args.tickers.split(',') if args.tickers else sorted({t for t, _ in keys})
+
+    print(f"{'interval':>8} {'base':>5} {'bars':>8} {'OHLC match':>11} {'volume match':>13}")
+    for interval, (base_interval, _) in DERIVED_INTERVALS.items():
+        total, prices, volume = 0, 0.0, 0.0
+        for ticker in tickers:
+            if (ticker, interval) not in keys or (ticker, base_interval) not in keys:
+                continue
+            count, price_match, volume_match = compare_with_downloaded(ticker, interval)
+            if count:
+                total += count
+                prices += price_match * count
+                volume += volume_match * count
+        if total:
+            print(f"{interval:>8} {base_interval:>5} {total:>8} {prices / total:>11.1%} {volume / total:>13.1%}")
+
+
+if __name__ == "__main__":
+    main()
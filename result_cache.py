@@ -0,0 +1,201 @@
+import os
+import io
+import json
+import time
+import hashlib
+import argparse
+import threading
+
+import numpy as np
+import pandas as pd
+
+from data_store import load_ohlcv, list_keys, data_version, DATA_DIR, MARKET_TZ
+
+RESULT_CACHE_DIR = os.path.join(DATA_DIR, 'result_cache')
+# 저장 형식이 바뀌면 올려서 이전 항목을 쓰지 않게 한다
+CACHE_FORMAT = 1
+# 프로세스마다 첫 저장과 이후 이 횟수만큼 저장할 때마다 디렉터리 크기를 확인해 오래된 항목 제거
+EVICT_EVERY = 32
+
+PARAM_NAMES = ['tolerance', 'compression_period', 'compression_threshold', 'ema_period', 'ma_long_period',
+               'ma_mid_periods']
+
+
+def _plain(value):
+    """numpy 값/튜플을 JSON으로 같은 문자열이 나오는 파이썬 값으로"""
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_plain(v) for v in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def result_key(ticker, interval, version, params):
+    """(티커, 캔들 주기, 데이터 버전, analyze_strategy 전체 파라미터)의 해시 (16진수 32자)"""
+    payload = json.dumps([CACHE_FORMAT, ticker, interval, version,
+                          [_plain(params[name]) for name in PARAM_NAMES]])
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+class CachedSignals:
+    """저장된 시그널 결과 (봉 수, 마지막 봉 시각, 시그널 비트 배열, 시그널 봉 시각)
+
+    analyze_strategy의 지표는 모두 과거 봉만 사용하므로, 앞쪽 일부 구간의 시그널은 전체 데이터
+    시그널의 앞부분과 같다. 그래서 전체 데이터 결과 하나로 종료일이 다른 요청에도 답할 수 있다.
+    """
+
+    def __init__(self, bars, last_bar, bits, times):
+        self.bars = int(bars)
+        self.last_bar = int(last_bar)
+        self.bits = bits
+        self.times = times
+
+    @classmethod
+    def from_signals(cls, signals):
+        values = signals.to_numpy(dtype=bool)
+        index = signals.index.tz_convert('UTC') if signals.index.tz is not None else signals.index
+        times = index.asi8
+        return cls(len(values), times[-1] if len(times) else 0, np.packbits(values), times[values])
+
+    def count(self, end=None):
+        """end 이전(미만) 봉의 시그널 수 (end가 None이면 전체)"""
+        if end is None:
+            return len(self.times)
+        end = pd.Timestamp(end)
+        end = end.tz_localize(MARKET_TZ) if end.tzinfo is None else end
+        return int(np.searchsorted(self.times, end.tz_convert('UTC').value, side='left'))
+
+    def series(self, index):
+        """index(같은 데이터의 봉 시각)에 맞춘 bool 시그널 Series (봉 수가 다르면 None)"""
+        if len(index) != self.bars:
+            return None
+        return pd.Series(np.unpackbits(self.bits, count=self.bars).astype(bool), index=index)
+
+
+class ResultCache:
+    """analyze_strategy 시그널 결과를 디스크에 보관하는 내용 주소 캐시
+
+    키는 result_key 해시이고 항목은 <키>.npz 파일 하나다. 임시 파일에 쓴 뒤 os.replace로 바꾸므로
+    여러 프로세스(앱, 스캔 워커, 수집기)가 동시에 읽고 써도 반쯤 쓴 파일을 읽지 않으며, 읽지 못한
+    항목은 없는 것으로 취급한다. 전체 크기가 max_bytes를 넘으면 오래 사용하지 않은(mtime) 항목부터
+    지운다 (적중할 때 mtime을 갱신한다).
+    """
+
+    def __init__(self, directory=RESULT_CACHE_DIR, max_bytes=64 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}.npz')
+
+    def get(self, ticker, interval, version, params):
+        """저장된 CachedSignals (없거나 읽을 수 없으면 None)"""
+        if version is None:
+            return None
+        path = self._path(result_key(ticker, interval, version, params))
+        try:
+            with np.load(path) as data:
+                entry = CachedSignals(data['bars'], data['last_bar'], data['bits'], data['times'])
+            os.utime(path)
+        except (OSError, ValueError, KeyError, EOFError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def put(self, ticker, interval, version, params, signals):
+        """전체 데이터의 시그널 Series를 저장하고 CachedSignals 반환 (version이 None이면 저장하지 않음)"""
+        entry = CachedSignals.from_signals(signals)
+        if version is None:
+            return entry
+        path = self._path(result_key(ticker, interval, version, params))
+        buffer = io.BytesIO()
+        np.savez(buffer, bars=entry.bars, last_bar=entry.last_bar, bits=entry.bits, times=entry.times)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                f.write(buffer.getvalue())
+            os.replace(tmp_path, path)
+        except OSError:
+            # 캐시에 못 써도 계산 결과는 그대로 사용
+            return entry
+        with self._lock:
+            self._puts += 1
+            evict = self._puts % EVICT_EVERY == 1
+        if evict:
+            self.evict()
+        return entry
+
+    def evict(self):
+        """전체 크기가 max_bytes 이하가 될 때까지 오래된 항목 삭제, 삭제한 항목 수 반환"""
+        try:
+            entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith('.npz')]
+        except FileNotFoundError:
+            return 0
+        files = []
+        for entry in entries:
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+        return removed
+
+    def size(self):
+        """(항목 수, 전체 바이트)"""
+        try:
+            sizes = [entry.stat().st_size for entry in os.scandir(self.directory) if entry.name.endswith('.npz')]
+        except FileNotFoundError:
+            return 0, 0
+        return len(sizes), sum(sizes)
+
+
+result_cache = ResultCache()
+
+
+def main():
+    """캐시 상태 확인 및 전체 티커 캐시 채우기/비우기"""
+    from strategy_analysis import analyze_strategy
+
+    parser = argparse.ArgumentParser(description='디스크 시그널 결과 캐시')
+    parser.add_argument('--fill', action='store_true', help='기본 파라미터로 저장된 전체 (티커, 캔들 주기) 계산')
+    parser.add_argument('--evict', action='store_true', help='크기 제한을 넘는 오래된 항목 삭제')
+    args = parser.parse_args()
+    params = dict(tolerance=1e-6, compression_period=20, compression_threshold=0.05,
+                  ema_period=120, ma_long_period=111, ma_mid_periods=(25, 33, 49))
+
+    if args.fill:
+        start = time.perf_counter()
+        computed = 0
+        for ticker, interval in list_keys():
+            version = data_version(ticker, interval)
+            if result_cache.get(ticker, interval, version, params) is not None:
+                continue
+            _, signals = analyze_strategy(load_ohlcv(ticker, interval, compact=True), **params)
+            result_cache.put(ticker, interval, version, params, signals)
+            computed += 1
+        print(f"Computed {computed} results ({time.perf_counter() - start:.1f}s)")
+    if args.evict:
+        print(f"Removed {result_cache.evict()} entries")
+    entries, size = result_cache.size()
+    print(f"{result_cache.directory}: {entries} entries, {size / 1024:.0f} KB (limit {result_cache.max_bytes >> 20} MB)")
+
+
+if __name__ == "__main__":
+    main()
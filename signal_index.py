@@ -0,0 +1,155 @@
+import os
+import json
+import math
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from data_store import list_keys, data_version, DATA_DIR, STORE_DIR
+from batch_strategy import UniverseArrays, analyze_universe
+
+INDEX_PATH = os.path.join(DATA_DIR, 'signal_index.parquet')
+
+# 미리 계산할 파라미터 조합. 'default'는 앱의 기본 사이드바 값
+SIGNAL_PRESETS = {
+    'default': dict(tolerance=1e-6, compression_period=20, compression_threshold=0.05,
+                    ema_period=120, ma_long_period=111, ma_mid_periods=(25, 33, 49)),
+    'strategy_default': dict(tolerance=0.0001, compression_period=20, compression_threshold=0.02,
+                             ema_period=120, ma_long_period=111, ma_mid_periods=(25, 33, 49)),
+    'loose': dict(tolerance=5e-5, compression_period=10, compression_threshold=0.01,
+                  ema_period=120, ma_long_period=111, ma_mid_periods=(25, 33, 49)),
+}
+
+
+def load_presets(path):
+    """JSON 파일({이름: 파라미터})에서 프리셋 읽기"""
+    with open(path) as f:
+        presets = json.load(f)
+    for params in presets.values():
+        params['ma_mid_periods'] = tuple(params['ma_mid_periods'])
+    return presets
+
+
+def build_signal_index(presets=None, tickers=None, intervals=None):
+    """(프리셋, 캔들 주기, 티커)별 시그널 시각 목록 계산
+
+    캔들 주기마다 전체 티커를 batch_strategy로 한 번에 평가한다 (analyze_strategy와 같은 결과).
+    반환값은 (시그널 표 [preset, interval, ticker, time], {'티커/캔들 주기': 데이터 버전}).
+    """
+    presets = presets or SIGNAL_PRESETS
+    keys = [(t, i) for t, i in list_keys()
+            if (tickers is None or t in tickers) and (intervals is None or i in intervals)]
+    by_interval = {}
+    for ticker, interval in keys:
+        by_interval.setdefault(interval, []).append(ticker)
+
+    versions = {}
+    rows = []
+    for interval, interval_tickers in by_interval.items():
+        for ticker in interval_tickers:
+            versions[f'{ticker}/{interval}'] = data_version(ticker, interval)
+        universe = UniverseArrays.load(interval_tickers, interval)
+        if not universe.tickers:
+            continue
+        for name, params in presets.items():
+            signals, _ = analyze_universe(universe, **params)
+            tickers_row, positions = np.nonzero(signals)
+            rows.append(pd.DataFrame({
+                'preset': name,
+                'interval': interval,
+                'ticker': np.asarray(universe.tickers)[tickers_row],
+                'time': pd.DatetimeIndex(universe.times[tickers_row, positions], tz='UTC'),
+            }))
+
+    columns = ['preset', 'interval', 'ticker', 'time']
+    table = pd.concat(rows, ignore_index=True) if rows else pd.DataFrame(columns=columns)
+    return table[columns], versions
+
+
+def save_signal_index(table, versions, presets=None, path=INDEX_PATH):
+    """시그널 표를 Parquet으로 저장 (프리셋과 데이터 버전은 파일 메타데이터에 기록)"""
+    presets = presets or SIGNAL_PRESETS
+    frame = table.astype({'preset': 'category', 'interval': 'category', 'ticker': 'category'})
+    arrow_table = pa.Table.from_pandas(frame, preserve_index=False)
+    metadata = dict(arrow_table.schema.metadata or {})
+    metadata[b'signal_index'] = json.dumps({
+        'presets': presets,
+        'versions': versions,
+        'built_at': pd.Timestamp.now(tz='UTC').isoformat(),
+    }).encode()
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + '.tmp'
+    pq.write_table(arrow_table.replace_schema_metadata(metadata), tmp_path, compression='zstd')
+    os.replace(tmp_path, path)
+    return path
+
+
+class SignalIndex:
+    """미리 계산한 시그널 목록 조회
+
+    counts/times는 인덱스를 만든 뒤 데이터 파일이 바뀌지 않은 경우에만 사용해야 하며,
+    is_current로 확인한다.
+    """
+
+    def __init__(self, table, presets, versions):
+        self.presets = presets
+        self.versions = versions
+        self._times = {}
+        for (preset, interval, ticker), times in table.groupby(['preset', 'interval', 'ticker'],
+                                                               observed=True)['time']:
+            self._times[(preset, interval, ticker)] = pd.DatetimeIndex(times)
+
+    @classmethod
+    def load(cls, path=INDEX_PATH):
+        table = pq.read_table(path)
+        info = json.loads(table.schema.metadata[b'signal_index'])
+        presets = {name: dict(params, ma_mid_periods=tuple(params['ma_mid_periods']))
+                   for name, params in info['presets'].items()}
+        return cls(table.to_pandas(), presets, info['versions'])
+
+    def find_preset(self, params):
+        """params와 같은 프리셋 이름 (없으면 None). 실수 값은 반올림 오차를 허용"""
+        for name, preset in self.presets.items():
+            if preset.keys() == params.keys() and all(
+                    math.isclose(preset[key], params[key], rel_tol=1e-9)
+                    if isinstance(preset[key], float) else tuple(np.atleast_1d(preset[key])) ==
+                    tuple(np.atleast_1d(params[key]))
+                    for key in preset):
+                return name
+        return None
+
+    def is_current(self, tickers, interval, versions=None, store_dir=STORE_DIR, data_dir=DATA_DIR):
+        """티커들의 데이터가 인덱스를 만들 때와 같은지 확인 (versions: 이미 구한 {티커: 데이터 버전})"""
+        if versions is None:
+            versions = {ticker: data_version(ticker, interval, store_dir, data_dir) for ticker in tickers}
+        return all(self.versions.get(f'{ticker}/{interval}') == versions[ticker] for ticker in tickers)
+
+    def times(self, preset, interval, ticker):
+        """시그널 시각 (UTC)"""
+        return self._times.get((preset, interval, ticker), pd.DatetimeIndex([], tz='UTC'))
+
+    def counts(self, preset, interval, tickers):
+        """{티커: 시그널 수}"""
+        return {ticker: len(self.times(preset, interval, ticker)) for ticker in tickers}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='프리셋별 시그널 인덱스 생성')
+    parser.add_argument('--presets', help='프리셋 JSON 파일 ({이름: 파라미터}, 기본: SIGNAL_PRESETS)')
+    parser.add_argument('--output', default=INDEX_PATH)
+    args = parser.parse_args()
+    presets = load_presets(args.presets) if args.presets else SIGNAL_PRESETS
+
+    start = time.perf_counter()
+    table, versions = build_signal_index(presets)
+    path = save_signal_index(table, versions, presets, args.output)
+    print(f"{len(versions)} (ticker, interval) keys x {len(presets)} presets, {len(table)} signals -> {path} "
+          f"({os.path.getsize(path) / 1024:.1f} KB, {time.perf_counter() - start:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
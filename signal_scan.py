@@ -0,0 +1,132 @@
+import os
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from data_store import load_ohlcv, data_version
+from strategy_analysis import analyze_strategy, indicator_cache
+from result_cache import result_cache, CachedSignals
+
+_executor = None
+_executor_lock = threading.Lock()
+# 워커 프로세스마다 따로 생기는 지표 캐시 크기 (앱 프로세스 기본 256MB를 워커 수만큼 쓰지 않도록)
+WORKER_INDICATOR_CACHE_BYTES = 32 * 1024 * 1024
+
+
+def _init_worker():
+    indicator_cache.max_bytes = WORKER_INDICATOR_CACHE_BYTES
+
+
+def get_executor(max_workers=None):
+    """여러 번의 스캔에서 재사용하는 프로세스 풀 반환
+
+    Streamlit 서버처럼 스레드가 많은 프로세스에서 fork하지 않도록 spawn 방식을 사용하며,
+    워커 시작 비용은 처음 한 번만 든다.
+    """
+    global _executor
+    # 백그라운드 작업 스레드 여러 개가 동시에 처음 호출해도 풀은 하나만 만든다
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=max_workers or os.cpu_count(),
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker
+            )
+    return _executor
+
+
+class ScanCache:
+    """전체 종목 스캔 결과({티커: 시그널 수})를 키별로 보관하는 LRU 캐시 (스레드 안전)
+
+    Streamlit은 세션마다 다른 스레드에서 스크립트를 실행하므로, 한 세션이 계산한 결과를
+    다른 세션이 그대로 사용할 수 있다. 키에는 데이터 버전이 들어가야 한다.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, counts):
+        with self._lock:
+            self._entries[key] = dict(counts)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def calculate_signals_for_ticker(ticker, interval, params, end_date=None, cache=result_cache):
+    """특정 티커의 시그널 수를 계산하는 함수 (로컬 데이터 저장소 사용)
+
+    디스크 결과 캐시(cache)에 같은 데이터 버전/파라미터 결과가 있으면 데이터를 읽지 않고 바로 반환한다.
+    """
+    try:
+        version = data_version(ticker, interval)
+        cached = cache.get(ticker, interval, version, params) if cache is not None else None
+        if cached is not None:
+            return cached.count(end_date)
+
+        # 지표는 과거 봉만 사용하므로 전체 데이터로 계산해 저장하고, 종료일 이전 시그널만 센다
+        data = load_ohlcv(ticker, interval, compact=True)
+        if len(data) == 0:
+            return 0
+
+        # 전략 분석
+        _, signals = analyze_strategy(
+            data,
+            tolerance=params['tolerance'],
+            compression_period=params['compression_period'],
+            compression_threshold=params['compression_threshold'],
+            ema_period=params['ema_period'],
+            ma_long_period=params['ma_long_period'],
+            ma_mid_periods=params['ma_mid_periods'],
+            cache_key=(ticker, interval, version)
+        )
+        if cache is not None:
+            return cache.put(ticker, interval, version, params, signals).count(end_date)
+        return CachedSignals.from_signals(signals).count(end_date)
+    except Exception:
+        return 0
+
+
+def scan_signal_counts(tickers, interval, params, end_date=None, executor=None):
+    """여러 티커의 시그널 수를 프로세스 풀에서 병렬로 계산
+
+    계산이 끝나는 순서대로 (티커, 시그널 수)를 yield 하므로
+    호출하는 쪽에서 진행 상황을 바로 표시할 수 있다. 디스크 결과 캐시에 있는 티커는
+    프로세스 풀에 보내지 않고 먼저 반환한다.
+    """
+    pending = []
+    for ticker in tickers:
+        cached = result_cache.get(ticker, interval, data_version(ticker, interval), params)
+        if cached is not None:
+            yield ticker, cached.count(end_date)
+        else:
+            pending.append(ticker)
+    if not pending:
+        return
+
+    executor = executor or get_executor()
+    futures = {
+        executor.submit(calculate_signals_for_ticker, ticker, interval, params, end_date): ticker
+        for ticker in pending
+    }
+    try:
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+    finally:
+        # 중간에 중단되면 아직 시작하지 않은 작업은 취소
+        for future in futures:
+            future.cancel()
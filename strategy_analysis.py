@@ -1,70 +1,184 @@
+import threading
+
 import pandas as pd
 import numpy as np
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import ta
-import plotly.io as pio
+from collections import OrderedDict
+
+from indicators import moving_averages, bar_seconds
+
+
+class IndicatorCache:
+    """지표/기울기 시리즈를 (티커, 캔들 주기, 데이터 버전, 종류, 기간) 키로 보관하는 LRU 캐시 (스레드 안전)
+
+    저장된 시리즈의 값 크기 합이 max_bytes를 넘으면 가장 오래 사용하지 않은 항목부터 제거한다.
+    Streamlit 세션 스레드와 백그라운드 작업 스레드가 함께 쓰므로 조회/저장/제거는 잠금 안에서 하고,
+    계산은 잠금 밖에서 한다 (같은 키를 동시에 계산하면 먼저 저장된 값을 쓴다).
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self.misses += 1
+
+        value = compute()
+        size = value.values.nbytes
+        with self._lock:
+            if key in self._entries:
+                # 다른 스레드가 먼저 저장했으면 그 값을 사용 (크기를 두 번 더하지 않는다)
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            if size <= self.max_bytes:
+                self._entries[key] = value
+                self.current_bytes += size
+                while self.current_bytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self.current_bytes -= evicted.values.nbytes
+        return value
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def stats(self):
+        """적중/미스 횟수와 현재 사용량"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+
+indicator_cache = IndicatorCache()
+
+
+def _data_key(ohlcv, cache_key):
+    """indicator_cache 키 앞부분 (같은 파일이라도 불러온 구간이 다르면 다른 데이터로 취급)"""
+    if cache_key is None:
+        return None
+    return tuple(cache_key) + (len(ohlcv), ohlcv.index[-1] if len(ohlcv) else None)
+
+
+def _cached(data_key, kind, period, compute):
+    if data_key is None:
+        return compute()
+    return indicator_cache.get_or_compute(data_key + (kind, period), compute)
+
+
+def strategy_indicators(ohlcv, ema_period=120, ma_long_period=111, ma_mid_periods=(25, 33, 49), cache_key=None):
+    """analyze_strategy의 이동평균선과 기울기 컬럼 (시그널은 계산하지 않음)"""
+    data_key = _data_key(ohlcv, cache_key)
+    close = ohlcv['close'].to_numpy(dtype=np.float64)
+    indicators = pd.DataFrame(index=ohlcv.index)
+    ma_kinds = list(dict.fromkeys([('EMA', ema_period), ('MA', ma_long_period)] +
+                                  [('MA', period) for period in ma_mid_periods]))
+
+    # 이동평균선과 기울기는 캐시에 없는 기간만 indicators 커널로 한 번에 계산
+    # (확인한 뒤 캐시에서 제거된 기간은 처음 필요할 때 그 기간만 계산)
+    missing = [(kind, period) for kind, period in ma_kinds
+               if data_key is None or any(data_key + (name, period) not in indicator_cache
+                                          for name in (kind, f'{kind}_slope'))]
+    computed = {}
+
+    def fused(kind, period, part):
+        if (kind, period) not in computed:
+            wanted = [key for key in missing if key not in computed]
+            if (kind, period) not in wanted:
+                wanted.append((kind, period))
+            seconds = _cached(data_key, 'seconds', None,
+                              lambda: pd.Series(bar_seconds(ohlcv.index)[0], index=ohlcv.index))
+            computed.update(moving_averages(close, seconds.to_numpy()[None, :],
+                                            ema_periods=[p for k, p in wanted if k == 'EMA'],
+                                            sma_periods=[p for k, p in wanted if k == 'MA']))
+        return pd.Series(computed[(kind, period)][part], index=ohlcv.index)
+
+    # 이동평균선
+    for kind, period in ma_kinds:
+        indicators[f'{kind}{period}'] = _cached(data_key, kind, period,
+                                                lambda kind=kind, period=period: fused(kind, period, 0))
+
+    # 각 이동평균선의 기울기
+    for kind, period in ma_kinds:
+        indicators[f'{kind}{period}_slope'] = _cached(data_key, f'{kind}_slope', period,
+                                                      lambda kind=kind, period=period: fused(kind, period, 1))
+    return indicators
+
 
 def analyze_strategy(ohlcv, tolerance=0.0001, compression_period=20, compression_threshold=0.02,
-                    ema_period=120, ma_long_period=111, ma_mid_periods=(25, 33, 49)):
-    # 이동평균선 계산
-    ohlcv[f'EMA{ema_period}'] = ta.trend.ema_indicator(ohlcv['close'], window=ema_period)
-    ohlcv[f'MA{ma_long_period}'] = ta.trend.sma_indicator(ohlcv['close'], window=ma_long_period)
-    
-    # 중기 이동평균선 계산
-    for period in ma_mid_periods:
-        ohlcv[f'MA{period}'] = ta.trend.sma_indicator(ohlcv['close'], window=period)
-    
-    # 각 이동평균선의 기울기 계산
-    ma_columns = [f'EMA{ema_period}', f'MA{ma_long_period}'] + [f'MA{period}' for period in ma_mid_periods]
-    for col in ma_columns:
-        ohlcv[f'{col}_slope'] = ohlcv[col].diff() / ohlcv.index.to_series().diff().dt.total_seconds()
-    
+                    ema_period=120, ma_long_period=111, ma_mid_periods=(25, 33, 49), cache_key=None):
+    """전략 분석
+
+    ohlcv는 변경하지 않으며, 이동평균선과 기울기 컬럼은 같은 인덱스의 별도 데이터로 반환한다:
+    (indicators, signals). 가격이 float32(compact_ohlcv)여도 지표는 float64로 계산한다.
+
+    cache_key로 (티커, 캔들 주기, 데이터 버전)을 넘기면 이동평균선/기울기/이전 고점 시리즈를
+    indicator_cache에 보관해, 파라미터 하나만 바뀐 재실행에서는 바뀐 지표만 다시 계산한다.
+    """
+    indicators = strategy_indicators(ohlcv, ema_period, ma_long_period, ma_mid_periods, cache_key)
+
     # 조건 1: EMA와 장기 MA가 평행한 구간 찾기
-    slope_diff = abs(ohlcv[f'EMA{ema_period}_slope'] - ohlcv[f'MA{ma_long_period}_slope'])
+    slope_diff = abs(indicators[f'EMA{ema_period}_slope'] - indicators[f'MA{ma_long_period}_slope'])
     condition1 = slope_diff < tolerance
 
     # 조건 2: 중기 MA들이 모두 양의 기울기, EMA와 장기 MA가 양의 기울기
-    condition2 = (ohlcv[f'EMA{ema_period}_slope'] > 0) & (ohlcv[f'MA{ma_long_period}_slope'] > 0)
+    condition2 = (indicators[f'EMA{ema_period}_slope'] > 0) & (indicators[f'MA{ma_long_period}_slope'] > 0)
     for period in ma_mid_periods:
-        condition2 &= ohlcv[f'MA{period}_slope'] > 0
+        condition2 &= indicators[f'MA{period}_slope'] > 0
 
     # 조건 3: 눌림목 찾기 (수정된 로직)
-    def find_pullback_breakout(df, period=compression_period, threshold=compression_threshold):
-        signals = pd.Series(False, index=df.index)
-        
-        for i in range(period, len(df)):
-            # 현재 구간의 데이터
-            window = df.iloc[i-period:i]
-            current_price = df.iloc[i]
-            
-            # 1. 이전 고점 찾기
-            previous_high = window['high'].max()
-            previous_close = window['close'].iloc[-1]
-            high_idx = window['high'].idxmax()
-            
-            # 2. 고점 이후 EMA120까지 하락했는지 확인
-            # after_high = df.loc[high_idx:df.index[i]]
-            # touched_ema = any(abs(after_high['low'] - after_high[f'EMA{ema_period}']) < (after_high[f'EMA{ema_period}'] * threshold))
-            
-            # 3. 현재 가격이 이전 고점 보다 낮은지 확인
-            breakout1 = current_price['open'] < previous_close* (1-threshold)
-            breakout2 =  current_price['open'] < previous_high
-            # 4. 현재 가격이 EMA와 장기 MA 사이에 있는지 확인
-            # above_mas = (current_price['close'] < current_price[f'EMA{ema_period}']) & \
-            #            (current_price['close'] > current_price[f'MA{ma_long_period}'])
-                    #    (current_price['close'] > current_price[f'MA{ma_mid_periods[0]}']) & \
-                    #    (current_price['close'] > current_price[f'MA{ma_mid_periods[1]}']) & \
-                    #    (current_price['close'] > current_price[f'MA{ma_mid_periods[2]}'])
-            
-            # 모든 조건을 만족하면 시그널 생성
-            # signals.iloc[i] = touched_ema and breakout and above_mas
-            signals.iloc[i] = breakout1 and breakout2
-        return signals
-    
-    condition3 = find_pullback_breakout(ohlcv)
-    
+    previous_high = _cached(_data_key(ohlcv, cache_key), 'previous_high', compression_period,
+                            lambda: rolling_previous_high(ohlcv['high'], compression_period))
+    condition3 = find_pullback_breakout(ohlcv, compression_period, compression_threshold, previous_high)
+
     # 모든 조건을 만족하는 구간
     signals = condition1 & condition2 & condition3
-    
-    return ohlcv, signals
+
+    return indicators, signals
+
+
+def rolling_previous_high(high, period):
+    """각 봉 직전 period개 봉(현재 봉 제외)의 최고가"""
+    return high.astype(np.float64).rolling(window=period, min_periods=1).max().shift(1)
+
+
+def find_pullback_breakout(df, period=20, threshold=0.02, previous_high=None):
+    """눌림목 조건(조건 3) 계산
+
+    각 봉의 시가가 직전 `period`개 봉의 최고가와 직전 종가*(1-threshold)보다
+    모두 낮으면 True. 행 단위 루프 대신 rolling max / shift 배열 연산으로 계산한다.
+    """
+    # 1. 이전 고점: 직전 period개 봉(현재 봉 제외)의 최고가
+    if previous_high is None:
+        previous_high = rolling_previous_high(df['high'], period)
+    # 2. 직전 종가 (float32 가격도 float64로 비교)
+    previous_close = df['close'].astype(np.float64).shift(1)
+    open_price = df['open'].astype(np.float64)
+
+    # 3. 현재 시가가 직전 종가와 이전 고점보다 낮은지 확인
+    breakout1 = open_price < previous_close * (1 - threshold)
+    breakout2 = open_price < previous_high
+    signals = breakout1 & breakout2
+
+    # 처음 period개 봉은 비교할 구간이 없으므로 시그널 없음
+    signals.iloc[:period] = False
+    return signals
+
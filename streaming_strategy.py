@@ -0,0 +1,222 @@
+import sys
+import time
+import math
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from data_store import read_csv
+from strategy_analysis import analyze_strategy
+
+NaN = float('nan')
+
+
+class RunningEMA:
+    """ta.trend.ema_indicator(adjust=False)와 같은 값을 내는 누적 EMA
+
+    pandas ewm의 계산 순서를 그대로 따르므로 전체 재계산 결과와 비트 단위로 같다.
+    """
+
+    def __init__(self, period):
+        self.period = period
+        alpha = 1. / (1. + (period - 1) / 2.0)
+        self.old_wt_factor = 1. - alpha
+        self.new_wt = alpha
+        self.weighted = None
+        self.old_wt = 1.
+        self.nobs = 0
+
+    def update(self, value):
+        is_observation = value == value
+        self.nobs += is_observation
+        if self.weighted is None:
+            self.weighted = value
+        elif self.weighted == self.weighted:
+            self.old_wt *= self.old_wt_factor
+            if is_observation:
+                if self.weighted != value:
+                    self.weighted = self.old_wt * self.weighted + self.new_wt * value
+                    self.weighted /= (self.old_wt + self.new_wt)
+                self.old_wt = 1.
+        elif is_observation:
+            self.weighted = value
+        return self.weighted if self.nobs >= self.period else NaN
+
+
+class RunningSMA:
+    """ta.trend.sma_indicator(rolling mean)와 같은 값을 내는 링 버퍼 SMA
+
+    pandas roll_mean의 보정 합(Kahan) 방식으로 봉마다 하나를 더하고 하나를 뺀다.
+    """
+
+    def __init__(self, period):
+        self.period = period
+        self.window = deque()
+        self.nobs = 0
+        self.sum_x = 0.
+        self.neg_ct = 0
+        self.compensation_add = 0.
+        self.compensation_remove = 0.
+        self.num_consecutive_same_value = 0
+        self.prev_value = None
+
+    def _add(self, value):
+        if value == value:
+            self.nobs += 1
+            y = value - self.compensation_add
+            t = self.sum_x + y
+            self.compensation_add = t - self.sum_x - y
+            self.sum_x = t
+            if math.copysign(1., value) < 0:
+                self.neg_ct += 1
+            if value == self.prev_value:
+                self.num_consecutive_same_value += 1
+            else:
+                self.num_consecutive_same_value = 1
+            self.prev_value = value
+
+    def _remove(self, value):
+        if value == value:
+            self.nobs -= 1
+            y = -value - self.compensation_remove
+            t = self.sum_x + y
+            self.compensation_remove = t - self.sum_x - y
+            self.sum_x = t
+            if math.copysign(1., value) < 0:
+                self.neg_ct -= 1
+
+    def update(self, value):
+        if self.prev_value is None or self.period == 1:
+            # 첫 봉(또는 기간 1)은 pandas와 같이 상태를 새로 시작
+            self.window.clear()
+            self.nobs = 0
+            self.sum_x = self.compensation_add = self.compensation_remove = 0.
+            self.neg_ct = 0
+            self.num_consecutive_same_value = 0
+            self.prev_value = value
+        elif len(self.window) == self.period:
+            self._remove(self.window.popleft())
+        self.window.append(value)
+        self._add(value)
+
+        if self.nobs < self.period or self.nobs == 0:
+            return NaN
+        result = self.sum_x / self.nobs
+        if self.num_consecutive_same_value >= self.nobs:
+            result = self.prev_value
+        elif self.neg_ct == 0 and result < 0:
+            result = 0.
+        elif self.neg_ct == self.nobs and result > 0:
+            result = 0.
+        return result
+
+
+class RunningMax:
+    """직전 period개 값의 최댓값 (단조 덱, NaN 무시)"""
+
+    def __init__(self, period):
+        self.period = period
+        self.count = 0
+        self.deque = deque()
+
+    def value(self):
+        return self.deque[0][1] if self.deque else NaN
+
+    def push(self, value):
+        while self.deque and self.deque[0][0] <= self.count - self.period:
+            self.deque.popleft()
+        if value == value:
+            while self.deque and self.deque[-1][1] <= value:
+                self.deque.pop()
+            self.deque.append((self.count, value))
+        self.count += 1
+        while self.deque and self.deque[0][0] <= self.count - self.period:
+            self.deque.popleft()
+
+
+class StreamingStrategy:
+    """봉이 하나씩 들어올 때마다 analyze_strategy의 조건 1~3을 O(1)로 갱신하는 평가기
+
+    EMA 상태, SMA 링 버퍼 합, 최근 compression_period개 고가, 직전 종가와 이동평균선 값을 보관하며
+    update()의 결과는 같은 데이터 전체를 analyze_strategy로 다시 계산한 시그널과 같다.
+    """
+
+    def __init__(self, tolerance=0.0001, compression_period=20, compression_threshold=0.02,
+                 ema_period=120, ma_long_period=111, ma_mid_periods=(25, 33, 49)):
+        self.tolerance = tolerance
+        self.compression_period = compression_period
+        self.compression_threshold = compression_threshold
+        self.ema_name = f'EMA{ema_period}'
+        self.long_name = f'MA{ma_long_period}'
+        self.mid_names = [f'MA{period}' for period in ma_mid_periods]
+
+        self.averages = {self.ema_name: RunningEMA(ema_period), self.long_name: RunningSMA(ma_long_period)}
+        for name, period in zip(self.mid_names, ma_mid_periods):
+            self.averages[name] = RunningSMA(period)
+
+        self.previous_high = RunningMax(compression_period)
+        self.previous_close = NaN
+        self.previous_time = None
+        self.bars = 0
+        self.values = {name: NaN for name in self.averages}
+        self.slopes = {name: NaN for name in self.averages}
+
+    def update(self, timestamp, open, high, low, close):
+        """새 봉 하나를 반영하고 이 봉의 시그널 여부 반환"""
+        timestamp = pd.Timestamp(timestamp)
+        seconds = NaN if self.previous_time is None else (timestamp - self.previous_time).value / 1e9
+
+        # 이동평균선과 기울기 갱신
+        for name, average in self.averages.items():
+            value = average.update(close)
+            self.slopes[name] = (value - self.values[name]) / seconds
+            self.values[name] = value
+
+        # 조건 1: EMA와 장기 MA가 평행
+        ema_slope = self.slopes[self.ema_name]
+        long_slope = self.slopes[self.long_name]
+        condition1 = abs(ema_slope - long_slope) < self.tolerance
+
+        # 조건 2: 모든 이동평균선이 양의 기울기
+        condition2 = all(self.slopes[name] > 0 for name in self.averages)
+
+        # 조건 3: 눌림목 (직전 종가/이전 고점보다 낮은 시가)
+        condition3 = (self.bars >= self.compression_period and
+                      open < self.previous_close * (1 - self.compression_threshold) and
+                      open < self.previous_high.value())
+
+        self.previous_high.push(high)
+        self.previous_close = close
+        self.previous_time = timestamp
+        self.bars += 1
+        return bool(condition1 and condition2 and condition3)
+
+
+def replay(ohlcv, **params):
+    """OHLCV 데이터를 한 봉씩 StreamingStrategy에 넣어 시그널 시리즈 반환"""
+    strategy = StreamingStrategy(**params)
+    signals = [strategy.update(timestamp, o, h, l, c)
+               for timestamp, o, h, l, c in zip(ohlcv.index, *(ohlcv[name].to_numpy(dtype=float).tolist()
+                                                                for name in ('open', 'high', 'low', 'close')))]
+    return pd.Series(signals, index=ohlcv.index)
+
+
+def main():
+    """data/*_1m_*.csv 파일을 재생해 전체 재계산 결과와 비교"""
+    path = sys.argv[1] if len(sys.argv) > 1 else 'data/AAPL_1m_20250213_20250219.csv'
+    params = dict(tolerance=1e-6, compression_period=20, compression_threshold=0.05)
+    ohlcv = read_csv(path)
+
+    start = time.perf_counter()
+    streamed = replay(ohlcv, **params)
+    elapsed = time.perf_counter() - start
+    _, expected = analyze_strategy(ohlcv, **params)
+
+    print(f"{path}: {len(ohlcv)} bars, {elapsed / len(ohlcv) * 1e6:.1f} us/bar")
+    print(f"signals: streaming {int(streamed.sum())}, full recompute {int(expected.sum())}, "
+          f"identical: {bool(np.array_equal(streamed.to_numpy(), expected.to_numpy()))}")
+
+
+if __name__ == "__main__":
+    main()
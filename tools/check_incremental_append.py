@@ -0,0 +1,50 @@
+"""시간대 없는 일봉 이상 데이터(yfinance 기본값)로 증분 수집해도 봉이 중복 저장되지 않는지 오프라인 확인
+
+data 폴더의 앞 구간을 시간대가 있는 그대로 임시 저장소에 넣고(CSV에서 옮긴 저장소), 겹치는 뒤 구간을
+FixtureBackend(naive_daily=True)로 이어 받은 뒤 저장된 봉이 원본과 같은지 비교한다. 다르면 종료 코드 1.
+"""
+import os
+import sys
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_store import load_ohlcv, append_ohlcv, OHLCV_COLUMNS  # noqa: E402
+from downloader import download_all, FixtureBackend  # noqa: E402
+
+
+def check(ticker, interval, overlap=10):
+    """(원본 봉 수, 저장된 봉 수, 인덱스 일치 여부)"""
+    source = load_ohlcv(ticker, interval, columns=OHLCV_COLUMNS)
+    middle = source.index[len(source) // 2]
+    resume = source.index[max(len(source) // 2 - overlap, 0)]
+    end = source.index[-1] + (source.index[-1] - source.index[-2])
+    with tempfile.TemporaryDirectory() as store_dir:
+        def save(ticker, interval, data):
+            append_ohlcv(data, ticker, interval, store_dir=store_dir, data_dir=store_dir)
+
+        download_all([(ticker, interval, source.index[0], middle)], FixtureBackend(), on_result=save)
+        download_all([(ticker, interval, resume, end)], FixtureBackend(naive_daily=True), on_result=save)
+        stored = load_ohlcv(ticker, interval, columns=OHLCV_COLUMNS, store_dir=store_dir, data_dir=store_dir)
+    return len(source), len(stored), stored.index.equals(source.index)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='시간대 없는 인덱스로 증분 수집 시 중복 저장 확인')
+    parser.add_argument('--tickers', default='AAPL,MSFT')
+    parser.add_argument('--intervals', default='1d,5d,1wk,1mo')
+    args = parser.parse_args()
+
+    failed = 0
+    for interval in args.intervals.split(','):
+        for ticker in args.tickers.split(','):
+            expected, stored, same = check(ticker, interval)
+            ok = same and expected == stored
+            failed += not ok
+            print(f"{ticker} ({interval}): {expected} source bars, {stored} stored bars {'ok' if ok else 'MISMATCH'}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""find_pullback_breakout(벡터화)과 벡터화 이전의 봉 단위 루프 결과를 data 폴더의 모든 CSV에서 비교
+
+다른 파일이 있으면 목록을 출력하고 종료 코드 1.
+"""
+import os
+import sys
+import glob
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_store import read_csv, DATA_DIR  # noqa: E402
+from strategy_analysis import find_pullback_breakout  # noqa: E402
+
+
+def pullback_loop(df, period=20, threshold=0.02):
+    """벡터화 이전의 봉 단위 루프 구현 (find_pullback_breakout 비교용 기준)"""
+    high = df['high'].to_numpy(dtype=np.float64)
+    close = df['close'].to_numpy(dtype=np.float64)
+    open_price = df['open'].to_numpy(dtype=np.float64)
+    signals = np.zeros(len(df), dtype=bool)
+
+    for i in range(period, len(df)):
+        # 1. 직전 period개 봉의 최고가와 직전 종가
+        previous_high = high[i - period:i].max()
+        previous_close = close[i - 1]
+
+        # 2. 현재 시가가 직전 종가*(1-threshold)와 이전 고점보다 낮은지 확인
+        breakout1 = open_price[i] < previous_close * (1 - threshold)
+        breakout2 = open_price[i] < previous_high
+        signals[i] = breakout1 and breakout2
+    return pd.Series(signals, index=df.index)
+
+
+def main():
+    """data 폴더의 모든 CSV에서 find_pullback_breakout과 봉 단위 루프 결과 비교"""
+    parser = argparse.ArgumentParser(description='눌림목 조건 벡터화 결과와 루프 결과 비교')
+    parser.add_argument('--params', default='20:0.05,5:0.01,50:0.0',
+                        help='쉼표로 구분한 눌림목 확인 기간:허용 범위 조합')
+    args = parser.parse_args()
+    params = [(int(period), float(threshold))
+              for period, threshold in (item.split(':') for item in args.params.split(','))]
+
+    files = sorted(glob.glob(f'{DATA_DIR}/*.csv'))
+    compared, mismatches = 0, []
+    loop_seconds = vector_seconds = 0.0
+    for path in files:
+        data = read_csv(path)
+        for period, threshold in params:
+            start = time.perf_counter()
+            expected = pullback_loop(data, period, threshold)
+            loop_seconds += time.perf_counter() - start
+
+            start = time.perf_counter()
+            actual = find_pullback_breakout(data, period, threshold)
+            vector_seconds += time.perf_counter() - start
+
+            compared += 1
+            different = int((actual.to_numpy(dtype=bool) != expected.to_numpy()).sum())
+            if different:
+                mismatches.append((path, period, threshold, different))
+
+    for path, period, threshold, different in mismatches:
+        print(f"MISMATCH {path} (period={period}, threshold={threshold}): {different} bars")
+    print(f"{len(files)} files x {len(params)} params: {compared - len(mismatches)}/{compared} identical, "
+          f"loop {loop_seconds:.1f}s, vectorized {vector_seconds:.1f}s")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+import time
+import argparse
+
+import numpy as np
+
+from data_store import list_keys
+from batch_strategy import UniverseArrays, universe_conditions
+
+DEFAULT_PARAMS = dict(tolerance=1e-6, compression_period=20, compression_threshold=0.05,
+                      ema_period=120, ma_long_period=111, ma_mid_periods=(25, 33, 49))
+
+
+def build_features(universe, params=None):
+    """(티커 x 봉 x 특징) float32 특징 배열과 특징 이름, 티커별 첫 사용 가능 봉 위치
+
+    특징은 로그 수익률, 갭/고가/저가 비율, analyze_strategy 이동평균선별 종가 이격도와 봉당 변화율,
+    조건 1~3과 시그널. 값이 모두 계산된 봉부터 쓸 수 있고, 그 전의 NaN은 0으로 채운다.
+    """
+    params = dict(DEFAULT_PARAMS, **(params or {}))
+    averages, conditions = universe_conditions(universe, **params)
+    close = universe.close
+    previous_close = np.full_like(close, np.nan)
+    previous_close[:, 1:] = close[:, :-1]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        columns = {
+            'return': np.log(close / previous_close),
+            'gap': universe.open / previous_close - 1,
+            'high': universe.high / close - 1,
+            'low': universe.low / close - 1,
+        }
+        for (kind, period), (average, _) in averages.items():
+            previous = np.full_like(average, np.nan)
+            previous[:, 1:] = average[:, :-1]
+            columns[f'{kind}{period}_distance'] = close / average - 1
+            # 기울기는 초 단위라 캔들 주기마다 크기가 다르므로 봉당 변화율로 넣는다
+            columns[f'{kind}{period}_change'] = average / previous - 1
+    columns['condition1'], columns['condition2'], columns['condition3'] = conditions
+    columns['signal'] = conditions[0] & conditions[1] & conditions[2]
+
+    features = np.empty(close.shape + (len(columns),), dtype=np.float32)
+    for i, values in enumerate(columns.values()):
+        features[:, :, i] = values
+    ready = np.isfinite(features).all(axis=2)
+    # 마지막 봉까지 값이 이어지는 첫 위치 (중간에 빠진 봉이 있으면 그 뒤부터)
+    last_missing = np.where(~ready, np.arange(close.shape[1]), -1).max(axis=1)
+    np.nan_to_num(features, copy=False, nan=0., posinf=0., neginf=0.)
+    return features, list(columns), last_missing + 1
+
+
+class TradingEnv:
+    """저장된 OHLCV로 N개 에피소드를 한 번의 NumPy 연산으로 진행하는 gym 형식 환경
+
+    에피소드마다 티커와 시작 봉을 무작위로 고르고, 관측은 최근 window개 봉의 특징과 현재 포지션을
+    이어 붙인 (N x observation_size) float32 배열이다. 행동은 목표 포지션 (0: 무포지션, 1: 매수,
+    short=True면 0/1/2 = 매도/무포지션/매수), 보상은 포지션 x 다음 봉 로그 수익률 - fee x 포지션 변화량.
+    step()은 gymnasium 벡터 환경처럼 (관측, 보상, terminated, truncated, info)를 반환하고 끝난 에피소드는
+    같은 step에서 새로 시작한다 (끝난 시점의 관측은 info['final_observation']).
+
+    관측/보상 배열은 미리 할당해 매 step 덮어쓰므로, 보관하려면 복사해야 한다.
+    """
+
+    def __init__(self, universe, num_envs=256, window=32, episode_length=256, fee=0.0005, short=False,
+                 params=None, seed=None):
+        self.tickers = universe.tickers
+        self.times = universe.times
+        features, self.feature_names, ready = build_features(universe, params)
+        rows, self.bars, feature_count = features.shape
+        self._features = features.reshape(rows * self.bars, feature_count)
+        self._returns = np.zeros(rows * self.bars, dtype=np.float32)
+        self._returns[:] = features[:, :, self.feature_names.index('return')].ravel()
+
+        self.num_envs = num_envs
+        self.window = window
+        self.episode_length = episode_length
+        self.fee = fee
+        self.short = short
+        self.action_count = 3 if short else 2
+        self.observation_size = window * feature_count + 1
+        self._rng = np.random.default_rng(seed)
+
+        # 티커별 시작 가능 봉 범위 [first, last): 관측 구간이 모두 준비되고 다음 봉이 있어야 한다
+        first = ready + window - 1
+        counts = np.maximum(self.bars - 1 - first, 0)
+        if counts.sum() == 0:
+            raise ValueError(f'No ticker has more than {window} usable bars')
+        self._first = first
+        self._start_cumsum = np.cumsum(counts)
+
+        # 미리 할당한 상태/출력 배열
+        self.rows = np.zeros(num_envs, dtype=np.int64)
+        self.steps = np.zeros(num_envs, dtype=np.int64)
+        self.t = np.zeros(num_envs, dtype=np.int64)
+        self.positions = np.zeros(num_envs, dtype=np.float32)
+        self.episode_returns = np.zeros(num_envs, dtype=np.float64)
+        self.observations = np.zeros((num_envs, self.observation_size), dtype=np.float32)
+        self.rewards = np.zeros(num_envs, dtype=np.float32)
+        self.terminated = np.zeros(num_envs, dtype=bool)
+        self.truncated = np.zeros(num_envs, dtype=bool)
+        self._window_view = self.observations[:, :-1].reshape(num_envs, window, feature_count)
+        self._lags = np.arange(-window + 1, 1, dtype=np.int64)
+        self._flat = np.zeros(num_envs, dtype=np.int64)
+        self._index = np.zeros((num_envs, window), dtype=np.int64)
+        self._next = np.zeros(num_envs, dtype=np.int64)
+        self._change = np.zeros(num_envs, dtype=np.float32)
+
+    @classmethod
+    def load(cls, interval='1d', tickers=None, end=None, **kwargs):
+        """저장소에서 캔들 주기 하나의 티커들(기본: 저장된 전체)을 불러와 환경 생성"""
+        if tickers is None:
+            tickers = sorted(t for t, i in list_keys() if i == interval)
+        return cls(UniverseArrays.load(tickers, interval, end=end), **kwargs)
+
+    def _sample(self, envs):
+        """envs 에피소드에 시작 가능한 (티커, 봉)을 균등하게 배정"""
+        draws = self._rng.integers(self._start_cumsum[-1], size=len(envs))
+        rows = np.searchsorted(self._start_cumsum, draws, side='right')
+        before = np.where(rows > 0, self._start_cumsum[rows - 1], 0)
+        self.rows[envs] = rows
+        self.t[envs] = self._first[rows] + draws - before
+        self.steps[envs] = 0
+        self.positions[envs] = 0.
+        self.episode_returns[envs] = 0.
+
+    def _observe(self, envs=None):
+        """최근 window개 봉 특징과 포지션을 관측 배열에 기록"""
+        np.multiply(self.rows, self.bars, out=self._flat)
+        self._flat += self.t
+        if envs is None:
+            np.add(self._flat[:, None], self._lags, out=self._index)
+            np.take(self._features, self._index, axis=0, out=self._window_view, mode='clip')
+            self.observations[:, -1] = self.positions
+        else:
+            self._window_view[envs] = self._features[self._flat[envs, None] + self._lags]
+            self.observations[envs, -1] = self.positions[envs]
+
+    def reset(self, seed=None):
+        """모든 에피소드를 새로 시작하고 관측 배열 반환"""
+        if seed is not None:
+            self._rng = np.random.default_rng(seed)
+        self._sample(np.arange(self.num_envs))
+        self._observe()
+        return self.observations, {}
+
+    def step(self, actions):
+        """actions (N,) 정수 배열로 모든 에피소드를 한 봉 진행"""
+        target = np.asarray(actions, dtype=np.float32)
+        if self.short:
+            target = target - 1
+        np.subtract(target, self.positions, out=self._change)
+        np.abs(self._change, out=self._change)
+        self.positions[:] = target
+
+        # 다음 봉 로그 수익률로 보상 계산
+        np.multiply(self.rows, self.bars, out=self._next)
+        self._next += self.t + 1
+        np.take(self._returns, self._next, out=self.rewards)
+        self.rewards *= self.positions
+        self.rewards -= self.fee * self._change
+        self.episode_returns += self.rewards
+
+        self.t += 1
+        self.steps += 1
+        np.greater_equal(self.t, self.bars - 1, out=self.terminated)
+        np.greater_equal(self.steps, self.episode_length, out=self.truncated)
+        self.truncated &= ~self.terminated
+        self._observe()
+
+        info = {}
+        done = np.flatnonzero(self.terminated | self.truncated)
+        if len(done):
+            info = {
+                'final_observation': self.observations[done].copy(),
+                'final_index': done,
+                'episode_return': self.episode_returns[done].copy(),
+                'ticker': [self.tickers[row] for row in self.rows[done]],
+            }
+            self._sample(done)
+            self._observe(done)
+        return self.observations, self.rewards, self.terminated, self.truncated, info
+
+
+def main():
+    """무작위 정책으로 초당 환경 step 수 측정"""
+    parser = argparse.ArgumentParser(description='벡터화 트레이딩 환경 속도 측정')
+    parser.add_argument('--interval', default='1d')
+    parser.add_argument('--envs', type=int, default=1024, help='동시에 진행할 에피소드 수')
+    parser.add_argument('--window', type=int, default=32, help='관측에 넣을 봉 수')
+    parser.add_argument('--episode-length', type=int, default=256)
+    parser.add_argument('--steps', type=int, default=1000, help='측정할 벡터 step 수')
+    parser.add_argument('--short', action='store_true', help='매도 포지션 허용')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    env = TradingEnv.load(args.interval, num_envs=args.envs, window=args.window,
+                          episode_length=args.episode_length, short=args.short, seed=0)
+    print(f"{args.interval}: {len(env.tickers)} tickers x {env.bars} bars, "
+          f"{len(env.feature_names)} features, observation {env.observation_size} "
+          f"({time.perf_counter() - start:.2f}s to build)")
+
+    rng = np.random.default_rng(0)
+    actions = rng.integers(env.action_count, size=(args.steps, args.envs))
+    env.reset()
+    episodes, total_return = 0, 0.
+    start = time.perf_counter()
+    for step_actions in actions:
+        _, _, _, _, info = env.step(step_actions)
+        if info:
+            episodes += len(info['final_index'])
+            total_return += info['episode_return'].sum()
+    elapsed = time.perf_counter() - start
+    steps = args.steps * args.envs
+    print(f"{steps:,} steps in {elapsed:.2f}s: {steps / elapsed:,.0f} steps/s "
+          f"({steps / elapsed * 60 / 1e6:.1f}M steps/min), {episodes} episodes finished, "
+          f"mean episode return {total_return / max(episodes, 1):.4f}")
+
+
+if __name__ == "__main__":
+    main()